@@ -0,0 +1,254 @@
+"""
+Non-Blocking HIPAA Audit Trail
+NIW Evidence: Audit Controls (45 CFR 164.312(b)) without Request-Path I/O
+
+Evidence:
+- Structured audit events are serialized when logged, so later changes to
+  the objects they describe cannot alter them, and enqueued on a bounded queue
+- A background writer thread drains the queue and writes events in batches
+- Drop-or-block policy when the queue is full, with dropped-event counters
+- Pending events are flushed on close(), at interpreter shutdown and when a
+  multiprocessing worker exits; forked children get a fresh queue and writer
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from datetime import datetime
+from multiprocessing import util as multiprocessing_util
+
+AUDIT_LOGGER_NAME = 'publichealthos.audit'
+# Opt-in JSON-lines file the default trail writes to when the audit logger has no handlers
+AUDIT_LOG_ENV = 'PUBLICHEALTHOS_AUDIT_LOG'
+QUEUE_FULL_POLICIES = ('drop', 'block')
+
+_STOP = object()
+
+
+class JsonLinesAuditSink:
+    """Appends each batch of serialized events to a JSON-lines file with one write and flush"""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self._file = None
+
+    def write_batch(self, events):
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, 'a')
+        self._file.write(''.join(event + '\n' for event in events))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def after_fork(self):
+        # The inherited handle belongs to the parent; the child opens its own
+        self._file = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LoggingAuditSink:
+    """
+    Forwards serialized events to a stdlib logger from the writer thread
+    While the logger has no handlers (library use without logging
+    configured) events go to ``fallback`` instead of being discarded.
+    """
+
+    def __init__(self, logger_name=AUDIT_LOGGER_NAME, fallback=None):
+        self.logger = logging.getLogger(logger_name)
+        self.fallback = fallback
+
+    def write_batch(self, events):
+        if self.fallback is not None and not self.logger.hasHandlers():
+            self.fallback.write_batch(events)
+            return
+        for event in events:
+            level = logging.getLevelName(json.loads(event).get('level', 'info').upper())
+            self.logger.log(level, event)
+
+    def after_fork(self):
+        if self.fallback is not None and hasattr(self.fallback, 'after_fork'):
+            self.fallback.after_fork()
+
+    def close(self):
+        if self.fallback is not None:
+            self.fallback.close()
+
+
+class AuditTrail:
+    """
+    Bounded, batched, background audit event writer
+    NIW Technical Evidence: Latency-Isolated Compliance Logging
+
+    ``log()`` serializes the event to a JSON line and never touches the sink;
+    sinks receive batches of those lines. With ``when_full='drop'`` a full queue
+    drops the event (counted in ``stats()['dropped']``); with ``'block'`` the
+    caller waits for space, trading latency for a complete trail.
+    """
+
+    def __init__(self, sink=None, max_queue_size=10_000, batch_size=256, flush_interval=0.5,
+                 when_full='drop'):
+        if when_full not in QUEUE_FULL_POLICIES:
+            raise ValueError(f"Unknown queue-full policy '{when_full}', expected one of {QUEUE_FULL_POLICIES}")
+        self.sink = sink if sink is not None else LoggingAuditSink()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.when_full = when_full
+        self._max_queue_size = max_queue_size
+        self._reset_writer_state()
+        _live_trails.add(self)
+
+    def _reset_writer_state(self):
+        self._queue = queue.Queue(maxsize=self._max_queue_size)
+        self._writer = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._counts = {'enqueued': 0, 'dropped': 0, 'written': 0, 'batches': 0, 'sink_errors': 0}
+        self._counts_lock = threading.Lock()
+
+    def _after_fork_in_child(self):
+        """
+        Fresh queue and writer in a forked child
+        The parent's writer thread does not exist in the child, and events
+        still queued in the parent are the parent's to write.
+        """
+        closed = self._closed
+        self._reset_writer_state()
+        self._closed = closed
+        if hasattr(self.sink, 'after_fork'):
+            self.sink.after_fork()
+
+    def log(self, event, level='info', **details):
+        """Enqueue one audit event; returns False if it was dropped"""
+        if self._closed:
+            return False
+        if self._writer is None:
+            self._start_writer()
+
+        record = {'timestamp': datetime.now().isoformat(), 'event': event, 'level': level}
+        record.update(details)
+        # Serialized now: details may reference live objects that change after logging
+        record = json.dumps(record, default=str)
+        try:
+            if self.when_full == 'block':
+                self._queue.put(record)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('enqueued')
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until every enqueued event has been written; returns False on timeout"""
+        if self._writer is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Flush pending events, stop the writer thread and close the sink"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join(timeout)
+        self.sink.close()
+
+    def stats(self):
+        with self._counts_lock:
+            return dict(self._counts, queued=self._queue.qsize())
+
+    def _count(self, key, amount=1):
+        with self._counts_lock:
+            self._counts[key] += amount
+
+    def _start_writer(self):
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name='audit-trail-writer', daemon=True
+                )
+                self._writer.start()
+                atexit.register(self.close)
+                # multiprocessing workers exit without running atexit handlers
+                multiprocessing_util.Finalize(self, self.close, exitpriority=0)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # Gather up to batch_size events, waiting at most flush_interval
+            while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            events = batch[:-1] if stop else batch
+            if events:
+                try:
+                    self.sink.write_batch(events)
+                    self._count('written', len(events))
+                    self._count('batches')
+                except Exception:
+                    self._count('sink_errors')
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+
+_live_trails = weakref.WeakSet()
+_default_trail = None
+_default_lock = threading.Lock()
+
+
+def _reset_trails_after_fork():
+    global _default_lock
+    _default_lock = threading.Lock()
+    for trail in list(_live_trails):
+        trail._after_fork_in_child()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_trails_after_fork)
+
+
+def default_audit_trail():
+    """
+    Process-wide trail forwarding to the 'publichealthos.audit' logger
+    If $PUBLICHEALTHOS_AUDIT_LOG is set, events are appended to that JSON-lines
+    file while the logger has no handlers; otherwise nothing is written to disk
+    and deployments configure logging or pass their own trail.
+    """
+    global _default_trail
+    if _default_trail is None:
+        with _default_lock:
+            if _default_trail is None:
+                path = os.environ.get(AUDIT_LOG_ENV)
+                fallback = JsonLinesAuditSink(path) if path else None
+                _default_trail = AuditTrail(LoggingAuditSink(fallback=fallback))
+    return _default_trail
@@ -0,0 +1,145 @@
+"""
+Declarative Clinical Validation Rule Engine
+NIW Evidence: Healthcare Data Quality Assurance at Scale
+
+Evidence:
+- Validation rules are declared as data (field, comparison, threshold, severity)
+- All rules are evaluated in one vectorized pass, each column read once
+- Per-row violation bitmasks allow quarantining bad rows without a rescan
+- Rule counts merge across chunks for streamed extracts
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+RULE_OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+
+
+@dataclass(frozen=True)
+class ClinicalRule:
+    """A value of ``field`` that satisfies ``operator threshold`` violates the rule"""
+    name: str
+    field: str
+    operator: str
+    threshold: float
+    severity: str = 'error'  # 'error' = implausible value, 'critical' = clinically urgent
+
+
+def rules_from_range_checks(range_checks):
+    """
+    Translate the CDC/ADA {field: {min, max, critical_high, critical_low}}
+    table into declarative rules
+    """
+    rules = []
+    for field, ranges in range_checks.items():
+        if 'min' in ranges:
+            rules.append(ClinicalRule(f"{field}_below_min", field, '<', ranges['min']))
+        if 'max' in ranges:
+            rules.append(ClinicalRule(f"{field}_above_max", field, '>', ranges['max']))
+        if 'critical_high' in ranges:
+            rules.append(ClinicalRule(
+                f"{field}_critical_high", field, '>=', ranges['critical_high'], 'critical'
+            ))
+        if 'critical_low' in ranges:
+            rules.append(ClinicalRule(
+                f"{field}_critical_low", field, '<', ranges['critical_low'], 'critical'
+            ))
+    return rules
+
+
+class ClinicalRuleSet:
+    """
+    Compiled rule registry evaluated in a single vectorized pass
+    NIW Technical Evidence: Scalable Clinical Data Validation
+
+    Rule ``i`` owns bit ``i`` of the per-row violation bitmask.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        if len(self.rules) > 64:
+            raise ValueError("ClinicalRuleSet supports at most 64 rules")
+        for rule in self.rules:
+            if rule.operator not in RULE_OPERATORS:
+                raise ValueError(f"Unsupported operator '{rule.operator}' in rule {rule.name}")
+
+        self.rule_names = [rule.name for rule in self.rules]
+        self.bitmask_dtype = next(
+            dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64)
+            if len(self.rules) <= np.iinfo(dtype).bits
+        )
+        # Group rules by column so each column is materialized once
+        self._rules_by_field = {}
+        for bit, rule in enumerate(self.rules):
+            self._rules_by_field.setdefault(rule.field, []).append((bit, rule))
+
+    @classmethod
+    def from_range_checks(cls, range_checks):
+        return cls(rules_from_range_checks(range_checks))
+
+    def severity_bits(self, severity):
+        """Bitmask selecting every rule of one severity"""
+        bits = 0
+        for bit, rule in enumerate(self.rules):
+            if rule.severity == severity:
+                bits |= 1 << bit
+        return self.bitmask_dtype(bits)
+
+    def evaluate(self, data):
+        """Evaluate every rule whose field is present in ``data``"""
+        bitmask = np.zeros(len(data), dtype=self.bitmask_dtype)
+        counts = {}
+        for field, field_rules in self._rules_by_field.items():
+            if field not in data.columns:
+                continue
+            values = data[field].to_numpy()
+            for bit, rule in field_rules:
+                threshold = rule.threshold
+                if _fits_integer_dtype(threshold, values.dtype):
+                    # Compare integer columns natively instead of promoting to float64
+                    threshold = int(threshold)
+                violated = RULE_OPERATORS[rule.operator](values, threshold)
+                # bool * bit is much faster than a masked (where=) bitwise_or
+                np.bitwise_or(bitmask, violated * self.bitmask_dtype(1 << bit), out=bitmask)
+                counts[rule.name] = int(np.count_nonzero(violated))
+        return RuleEvaluation(self, bitmask, counts)
+
+
+class RuleEvaluation:
+    """Per-row violation bitmask and per-rule counts for one frame or chunk"""
+
+    def __init__(self, rule_set, bitmask, counts):
+        self.rule_set = rule_set
+        self.bitmask = bitmask
+        self.counts = counts
+
+    def failing_rows(self, severity='error'):
+        """Boolean mask of rows violating any rule of ``severity`` (None = any rule)"""
+        if severity is None:
+            return self.bitmask != 0
+        return (self.bitmask & self.rule_set.severity_bits(severity)) != 0
+
+    def violated_rules(self, row_position):
+        """Names of the rules violated by one row, decoded from its bitmask"""
+        row_bits = int(self.bitmask[row_position])
+        return [name for bit, name in enumerate(self.rule_set.rule_names) if row_bits >> bit & 1]
+
+
+def _fits_integer_dtype(threshold, dtype):
+    if not np.issubdtype(dtype, np.integer) or not float(threshold).is_integer():
+        return False
+    limits = np.iinfo(dtype)
+    return limits.min <= threshold <= limits.max
+
+
+def merge_rule_counts(total_counts, chunk_counts):
+    """Accumulate one chunk's rule counts into running totals"""
+    for rule_name, count in chunk_counts.items():
+        total_counts[rule_name] = total_counts.get(rule_name, 0) + count
+    return total_counts
@@ -0,0 +1,226 @@
+"""
+Indexed Cohort Queries over Scored Risk Results
+NIW Evidence: Population Health Care-Management Worklists
+
+Evidence:
+- Per complication, patients are kept sorted by (risk level, probability), so
+  every risk level and every clinical-alert set is one contiguous range
+- Probability ranges, thresholds and risk levels resolve by binary search in
+  O(log n) plus the size of the answer
+- Multi-complication queries start from the most selective condition and
+  filter its candidates with direct row lookups
+- Rescored patients go to a small delta that queries scan; the sorted
+  arrays are rebuilt only once the delta outgrows ``compact_fraction``
+"""
+
+import numpy as np
+
+from feature_store import decode_hashed_ids, encode_hashed_ids
+from risk_inference import ALERT_RISK_LEVELS, RISK_LEVELS, classify_risk_levels
+
+ALERT_LEVEL_CODES = [RISK_LEVELS.index(level) for level in ALERT_RISK_LEVELS]
+
+
+class _ComplicationColumns:
+    """Row-ordered and sorted columns of one complication"""
+
+    def __init__(self):
+        self.probability = np.empty(0, dtype=np.float64)
+        self.level = np.empty(0, dtype=np.int8)
+        self.sorted_rows = np.empty(0, dtype=np.int64)
+        self.sorted_probability = np.empty(0, dtype=np.float64)
+        self.sorted_level = np.empty(0, dtype=np.int8)
+
+    def rebuild(self):
+        self.sorted_rows = np.lexsort((self.probability, self.level))
+        self.sorted_probability = self.probability[self.sorted_rows]
+        self.sorted_level = self.level[self.sorted_rows]
+
+    def level_range(self, code):
+        return (int(np.searchsorted(self.sorted_level, code, side='left')),
+                int(np.searchsorted(self.sorted_level, code, side='right')))
+
+    def probability_range(self, low, high):
+        # Probability is non-decreasing in (level, probability) order
+        start = int(np.searchsorted(self.sorted_probability, low, side='left')) if low is not None else 0
+        stop = (int(np.searchsorted(self.sorted_probability, high, side='left')) if high is not None
+                else len(self.sorted_rows))
+        return start, max(start, stop)
+
+
+class RiskResultIndex:
+    """
+    Columnar risk results with risk-level and clinical-alert indexes
+    NIW Technical Evidence: Sub-Linear Population Risk Queries
+
+    Loads predict_batch / RiskScorer.predict_batch output keyed by hashed_id.
+    Probability conditions are half-open ``[low, high)`` ranges; a ``None``
+    bound is open.
+    """
+
+    def __init__(self, complications, compact_fraction=0.05, min_compact_rows=10_000):
+        self.complications = list(complications)
+        self.compact_fraction = compact_fraction
+        self.min_compact_rows = min_compact_rows
+        self.keys = np.empty(0, dtype=np.uint64)
+        self._key_order = np.empty(0, dtype=np.int64)
+        # Rows whose current scores are in the sorted arrays; the rest are the delta
+        self._in_sorted = np.empty(0, dtype=bool)
+        self._delta_rows = np.empty(0, dtype=np.int64)
+        self._columns = {complication: _ComplicationColumns() for complication in self.complications}
+
+    @classmethod
+    def from_scores(cls, scores, hashed_ids=None, **options):
+        """Index built from one scoring run (complications inferred from the columns)"""
+        complications = [column[:-len('_probability')] for column in scores
+                         if column.endswith('_probability')]
+        index = cls(complications, **options)
+        index.upsert(scores, hashed_ids)
+        return index
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def delta_size(self):
+        return len(self._delta_rows)
+
+    def _rows_for(self, keys):
+        """Row of each patient key, -1 when not indexed"""
+        if len(self._key_order) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        sorted_keys = self.keys[self._key_order]
+        slots = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return np.where(sorted_keys[slots] == keys, self._key_order[slots], -1)
+
+    def upsert(self, scores, hashed_ids=None):
+        """
+        Add or rescore patients
+        ``scores`` maps ``<complication>_probability`` (and optionally
+        ``_risk_level``) columns to arrays; ids come from ``hashed_ids``, a
+        ``hashed_id`` column or the DataFrame index, in that order.
+        """
+        if hashed_ids is None:
+            hashed_ids = scores['hashed_id'] if 'hashed_id' in scores else scores.index
+        keys = encode_hashed_ids(hashed_ids)
+        # Last score wins when a patient appears twice in one load
+        keys, last = np.unique(keys[::-1], return_index=True)
+        positions = len(hashed_ids) - 1 - last
+
+        rows = self._rows_for(keys)
+        new = rows < 0
+        n_new = int(new.sum())
+        if n_new:
+            rows[new] = np.arange(len(self.keys), len(self.keys) + n_new)
+            self.keys = np.concatenate([self.keys, keys[new]])
+            self._key_order = np.argsort(self.keys, kind='stable')
+            self._in_sorted = np.concatenate([self._in_sorted, np.zeros(n_new, dtype=bool)])
+            for columns in self._columns.values():
+                columns.probability = np.concatenate([columns.probability, np.zeros(n_new)])
+                columns.level = np.concatenate([columns.level, np.zeros(n_new, dtype=np.int8)])
+
+        for complication, columns in self._columns.items():
+            probability = np.asarray(scores[f"{complication}_probability"], dtype=np.float64)[positions]
+            level_column = f"{complication}_risk_level"
+            levels = (np.asarray(scores[level_column])[positions] if level_column in scores
+                      else classify_risk_levels(probability))
+            columns.probability[rows] = probability
+            columns.level[rows] = _level_codes(levels)
+
+        self._in_sorted[rows] = False
+        self._delta_rows = np.union1d(self._delta_rows, rows)
+        compacted = self.delta_size > max(self.min_compact_rows, self.compact_fraction * len(self))
+        if compacted:
+            self.compact()
+        return {'inserted': n_new, 'updated': len(rows) - n_new, 'compacted': compacted}
+
+    def compact(self):
+        """Fold the delta into the sorted arrays"""
+        for columns in self._columns.values():
+            columns.rebuild()
+        self._in_sorted[:] = True
+        self._delta_rows = np.empty(0, dtype=np.int64)
+
+    def _condition_ranges(self, complication, condition):
+        """Sorted-array ranges and a row predicate for one condition"""
+        columns = self._columns[complication]
+        kind, value = condition
+        if kind == 'levels':
+            codes = _level_codes(value)
+            ranges = [columns.level_range(code) for code in codes]
+            return ranges, lambda rows: np.isin(columns.level[rows], codes)
+        low, high = value
+        ranges = [columns.probability_range(low, high)]
+
+        def in_range(rows):
+            probability = columns.probability[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if low is not None:
+                keep &= probability >= low
+            if high is not None:
+                keep &= probability < high
+            return keep
+        return ranges, in_range
+
+    def query_rows(self, risk_levels=None, probability=None, alerts=()):
+        """Row positions matching every condition (see query)"""
+        conditions = []
+        for complication, levels in (risk_levels or {}).items():
+            conditions.append((complication, ('levels', [levels] if isinstance(levels, str) else list(levels))))
+        for complication, bounds in (probability or {}).items():
+            conditions.append((complication, ('probability', tuple(bounds))))
+        for complication in alerts:
+            conditions.append((complication, ('levels', ALERT_RISK_LEVELS)))
+        if not conditions:
+            raise ValueError("A cohort query needs at least one condition")
+        unknown = {complication for complication, _ in conditions} - set(self._columns)
+        if unknown:
+            raise ValueError(f"Unknown complications {sorted(unknown)}, expected {self.complications}")
+
+        resolved = [self._condition_ranges(complication, condition) for complication, condition in conditions]
+        # Drive from the condition with the fewest sorted candidates
+        driver = min(range(len(resolved)), key=lambda i: sum(stop - start for start, stop in resolved[i][0]))
+        sorted_rows = self._columns[conditions[driver][0]].sorted_rows
+        candidates = [sorted_rows[start:stop] for start, stop in resolved[driver][0]]
+        rows = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.int64)
+        rows = rows[self._in_sorted[rows]]
+        if self.delta_size:
+            delta = self._delta_rows
+            rows = np.concatenate([rows, delta[resolved[driver][1](delta)]])
+
+        for i, (_, predicate) in enumerate(resolved):
+            if i != driver and len(rows):
+                rows = rows[predicate(rows)]
+        return rows
+
+    def query(self, risk_levels=None, probability=None, alerts=()):
+        """
+        hashed_ids of patients matching every condition
+        ``risk_levels``: {complication: level or [levels]},
+        ``probability``: {complication: (low, high)},
+        ``alerts``: complications whose clinical alert must be raised.
+        e.g. ``query(risk_levels={'nephropathy_risk': 'very_high', 'cardiovascular_risk': 'high'})``
+        """
+        return decode_hashed_ids(self.keys[self.query_rows(risk_levels, probability, alerts)])
+
+    def count(self, risk_levels=None, probability=None, alerts=()):
+        return len(self.query_rows(risk_levels, probability, alerts))
+
+    def top(self, complication, n=100):
+        """hashed_ids of the ``n`` highest-probability patients, highest first"""
+        columns = self._columns[complication]
+        rows = columns.sorted_rows[::-1][:n + self.delta_size]
+        rows = np.concatenate([rows[self._in_sorted[rows]], self._delta_rows])
+        rows = rows[np.lexsort((columns.probability[rows], columns.level[rows]))[::-1][:n]]
+        return decode_hashed_ids(self.keys[rows])
+
+
+def _level_codes(levels):
+    """int8 codes of risk level names, in RISK_LEVELS order"""
+    levels = np.asarray(levels, dtype=object)
+    codes = np.full(len(levels), -1, dtype=np.int8)
+    for code, level in enumerate(RISK_LEVELS):
+        codes[levels == level] = code
+    if (codes < 0).any():
+        raise ValueError(f"Unknown risk levels {sorted(set(levels[codes < 0]))}, expected {RISK_LEVELS}")
+    return codes
@@ -0,0 +1,333 @@
+"""
+Incremental Derived-Feature Store Keyed by hashed_id
+NIW Evidence: Daily-Refresh Clinical Feature Engineering
+
+Evidence:
+- One raw binary file per column, memory-mapped for reads, plus a JSON manifest
+- Every row keeps a 64-bit content hash of its raw clinical inputs
+- A daily load recomputes derived features only for new or changed patients;
+  unchanged rows cost one hash comparison
+- Changed rows are rewritten in place and new rows appended, so a load's
+  write volume follows the delta rather than the registry size
+- Training and scoring read only the columns they need straight from the store
+"""
+
+import binascii
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from audit_log import default_audit_trail
+from data_processor import BMI_CATEGORIES, ClinicalDataProcessor
+
+MANIFEST_FILE = 'manifest.json'
+STORE_FORMAT_VERSION = 1
+# 16-hex-char pseudonyms (see data_processor.pseudonymize_ids) are stored as 64-bit keys
+ID_DTYPE = np.dtype(np.uint64)
+ID_COLUMN = 'hashed_id'
+HASH_COLUMN = 'row_hash'
+# Derived by ClinicalDataProcessor.calculate_clinical_metrics; bmi_category is stored as int8 codes
+DERIVED_FEATURES = ['mean_arterial_pressure', 'non_hdl_cholesterol', 'bmi_category']
+# Complication outcomes (DiabetesRiskEngine.complication_types): stored for
+# training but not hashed, so label-only edits never recompute derived features
+LABEL_COLUMNS = ['retinopathy_risk', 'neuropathy_risk', 'nephropathy_risk', 'cardiovascular_risk']
+BMI_CATEGORY_LEVELS = BMI_CATEGORIES + ['unknown']
+
+
+def encode_hashed_ids(hashed_ids):
+    """uint64 keys of 16-hex-char pseudonyms, preserving their sort order"""
+    hex_ids = np.asarray(hashed_ids, dtype=object).astype('S16')
+    return np.frombuffer(binascii.unhexlify(hex_ids.tobytes()), dtype='>u8').astype(ID_DTYPE)
+
+
+def decode_hashed_ids(keys):
+    """Inverse of encode_hashed_ids"""
+    hex_ids = np.ascontiguousarray(keys, dtype='>u8').tobytes().hex().encode()
+    return np.frombuffer(hex_ids, dtype='S16').astype(str)
+
+
+def _cast_losslessly(data, dtypes):
+    """``data`` cast to the stored dtypes; ValueError if any value would change"""
+    cast = {}
+    for name, dtype in dtypes.items():
+        values = data[name].to_numpy()
+        dtype = np.dtype(dtype)
+        try:
+            with np.errstate(invalid='ignore'):
+                stored = values.astype(dtype)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Column '{name}' cannot be stored as {dtype}: {e}") from None
+        if not np.can_cast(values.dtype, dtype, 'safe') and not np.array_equal(
+                stored.astype(values.dtype), values, equal_nan=values.dtype.kind == 'f'):
+            raise ValueError(
+                f"Column '{name}' holds {values.dtype} values that {dtype} (fixed by the first load) "
+                "cannot store exactly; rebuild the feature store to change its schema"
+            )
+        cast[name] = stored
+    return pd.DataFrame(cast, index=data.index)
+
+
+def _row_hashes(inputs):
+    """Stable 64-bit content hash of each row's raw input values"""
+    return pd.util.hash_pandas_object(inputs, index=False).to_numpy()
+
+
+class ClinicalFeatureStore:
+    """
+    Persistent columnar store of raw inputs and derived clinical features
+    NIW Technical Evidence: Incremental Population Feature Engineering
+
+    The input schema (numeric columns besides hashed_id) is fixed by the first
+    load; later loads whose values that schema cannot store exactly are
+    refused. Label columns are stored alongside but kept out of the row
+    hash, and only labels that differ are rewritten. Crash safety: the manifest's row count is written last, so appended
+    bytes past it are ignored, and row hashes are updated after the features,
+    so a row interrupted mid-update is recomputed by the next load.
+    """
+
+    def __init__(self, directory, processor=None, audit_trail=None):
+        self.directory = str(directory)
+        self.audit_trail = audit_trail if audit_trail is not None else default_audit_trail()
+        # Compact mode yields bmi_category codes without materializing strings
+        self.processor = processor if processor is not None else ClinicalDataProcessor(
+            compact_dtypes=True, audit_trail=self.audit_trail
+        )
+        self.manifest = None
+        os.makedirs(self.directory, exist_ok=True)
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def __len__(self):
+        return self.manifest['row_count'] if self.manifest else 0
+
+    @property
+    def input_columns(self):
+        return list(self.manifest['inputs']) if self.manifest else []
+
+    @property
+    def label_columns(self):
+        return list(self.manifest.get('labels', [])) if self.manifest else []
+
+    @property
+    def columns(self):
+        return self.input_columns + self.label_columns + DERIVED_FEATURES
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def _column(self, name, mode='r'):
+        """Memory-mapped view of a stored column (or its bmi_category codes)"""
+        dtype = np.dtype(self.manifest['dtypes'][name])
+        if len(self) == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(name), dtype=dtype, mode=mode, shape=(len(self),))
+
+    def _order(self):
+        if len(self) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.fromfile(os.path.join(self.directory, self.manifest['order_file']), dtype=np.int64)
+
+    def _lookup(self, ids):
+        """Row position of each encoded hashed_id, -1 when absent"""
+        order = self._order()
+        if len(order) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        sorted_ids = self._column(ID_COLUMN)[order]
+        # Probing in sorted order keeps the binary searches cache-friendly
+        probe_order = np.argsort(ids, kind='stable')
+        slots = np.empty(len(ids), dtype=np.int64)
+        slots[probe_order] = np.searchsorted(sorted_ids, ids[probe_order])
+        slots = np.minimum(slots, len(order) - 1)
+        return np.where(sorted_ids[slots] == ids, order[slots], -1)
+
+    def _create_schema(self, data):
+        labels = [c for c in LABEL_COLUMNS if c in data.columns]
+        inputs = [c for c in data.columns if c != ID_COLUMN and c not in DERIVED_FEATURES + labels]
+        non_numeric = [c for c in inputs + labels if not pd.api.types.is_numeric_dtype(data[c])]
+        if non_numeric:
+            raise ValueError(f"Feature store inputs must be numeric, got {non_numeric}")
+        dtypes = {ID_COLUMN: ID_DTYPE.str, HASH_COLUMN: np.dtype(np.uint64).str}
+        dtypes.update({c: data[c].dtype.str for c in inputs + labels})
+        dtypes.update({'mean_arterial_pressure': np.dtype(np.float64).str,
+                       'non_hdl_cholesterol': np.dtype(np.float64).str,
+                       'bmi_category': np.dtype(np.int8).str})
+        self.manifest = {
+            'format_version': STORE_FORMAT_VERSION, 'row_count': 0, 'generation': 0,
+            'inputs': inputs, 'labels': labels, 'dtypes': dtypes, 'order_file': None,
+        }
+        for name in dtypes:
+            open(self._path(name), 'wb').close()
+
+    def _derive(self, inputs):
+        """Derived feature arrays for the given raw input rows"""
+        enhanced = self.processor.calculate_clinical_metrics(inputs)
+        derived = {}
+        for name in ('mean_arterial_pressure', 'non_hdl_cholesterol'):
+            derived[name] = (enhanced[name].to_numpy(dtype=np.float64) if name in enhanced
+                             else np.full(len(inputs), np.nan))
+        if 'bmi_category' in enhanced:
+            # Categorical from a compact-dtype processor, strings from a default one
+            categories = pd.Categorical(enhanced['bmi_category'], categories=BMI_CATEGORY_LEVELS)
+            derived['bmi_category'] = categories.codes.astype(np.int8)
+        else:
+            derived['bmi_category'] = np.full(len(inputs), BMI_CATEGORY_LEVELS.index('unknown'), dtype=np.int8)
+        return derived
+
+    def upsert(self, data):
+        """
+        Load a snapshot or delta of processed patients
+        Derived features are recomputed only for rows whose hashed_id is new
+        or whose raw inputs changed. Returns load statistics.
+        """
+        start = time.perf_counter()
+        if ID_COLUMN not in data.columns:
+            raise ValueError(f"Feature store loads require a '{ID_COLUMN}' column")
+        ids = encode_hashed_ids(data[ID_COLUMN])
+        duplicated = pd.Series(ids).duplicated(keep='last').to_numpy()
+        if duplicated.any():
+            data, ids = data[~duplicated], ids[~duplicated]
+        if self.manifest is None:
+            self._create_schema(data)
+        missing = [c for c in self.input_columns + self.label_columns if c not in data.columns]
+        unknown = [c for c in data.columns if c not in self.columns and c != ID_COLUMN]
+        if missing or unknown:
+            raise ValueError(f"Load does not match the feature store schema (missing {missing}, unknown {unknown})")
+
+        dtypes = self.manifest['dtypes']
+        inputs = _cast_losslessly(data, {c: dtypes[c] for c in self.input_columns})
+        labels = _cast_losslessly(data, {c: dtypes[c] for c in self.label_columns})
+        hashes = _row_hashes(inputs)
+
+        positions = self._lookup(ids)
+        existing = positions >= 0
+        stored_hashes = self._column(HASH_COLUMN)
+        changed = existing.copy()
+        changed[existing] = stored_hashes[positions[existing]] != hashes[existing]
+        new = ~existing
+        del stored_hashes
+
+        relabeled = 0
+        if changed.any():
+            self._update_rows(positions[changed], inputs[changed], hashes[changed])
+        if existing.any() and self.label_columns:
+            relabeled = self._update_labels(positions[existing], labels[existing])
+        if new.any():
+            self._append_rows(ids[new], inputs[new], labels[new], hashes[new])
+
+        stats = {
+            'rows_in': len(data),
+            'inserted': int(new.sum()),
+            'updated': int(changed.sum()),
+            'unchanged': int(existing.sum() - changed.sum()),
+            'relabeled': relabeled,
+            'row_count': len(self),
+            'seconds': round(time.perf_counter() - start, 4),
+        }
+        self.audit_trail.log('feature_store_updated', component='feature_store', directory=self.directory, **stats)
+        return stats
+
+    def _update_rows(self, positions, inputs, hashes):
+        derived = self._derive(inputs)
+        for name in self.input_columns:
+            column = self._column(name, mode='r+')
+            column[positions] = inputs[name].to_numpy()
+            column.flush()
+        for name, values in derived.items():
+            column = self._column(name, mode='r+')
+            column[positions] = values
+            column.flush()
+        # Hashes last: a crash before this leaves the rows marked stale
+        column = self._column(HASH_COLUMN, mode='r+')
+        column[positions] = hashes
+        column.flush()
+
+    def _update_labels(self, positions, labels):
+        """Rewrite only the stored labels that differ; returns the number of rows relabeled"""
+        relabeled = np.zeros(len(positions), dtype=bool)
+        for name in self.label_columns:
+            column = self._column(name, mode='r+')
+            values = labels[name].to_numpy()
+            differs = column[positions] != values
+            if differs.any():
+                column[positions[differs]] = values[differs]
+                column.flush()
+                relabeled |= differs
+        return int(relabeled.sum())
+
+    def _append_rows(self, ids, inputs, labels, hashes):
+        row_count = len(self)
+        dtypes = self.manifest['dtypes']
+        values = {ID_COLUMN: ids, HASH_COLUMN: hashes, **self._derive(inputs)}
+        values.update({name: inputs[name].to_numpy() for name in self.input_columns})
+        values.update({name: labels[name].to_numpy() for name in self.label_columns})
+        for name, array in values.items():
+            dtype = np.dtype(dtypes[name])
+            with open(self._path(name), 'r+b') as f:
+                # Drop bytes left past the committed row count by an interrupted load
+                f.truncate(row_count * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+
+        # Merge the new ids into the sorted index, then commit the manifest
+        old_order = self._order()
+        all_ids = np.concatenate([self._column(ID_COLUMN)[old_order], ids])
+        all_positions = np.concatenate([old_order, np.arange(row_count, row_count + len(ids))])
+        order = all_positions[np.argsort(all_ids, kind='stable')]
+
+        generation = self.manifest['generation'] + 1
+        order_file = f"order-{generation:06d}.idx"
+        order.astype(np.int64).tofile(os.path.join(self.directory, order_file))
+        previous_order_file = self.manifest['order_file']
+        self.manifest = dict(self.manifest, row_count=row_count + len(ids), generation=generation,
+                             order_file=order_file)
+        self._write_manifest()
+        if previous_order_file:
+            os.remove(os.path.join(self.directory, previous_order_file))
+
+    def _write_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def rebuild(self, data):
+        """Full recompute: drop every stored row and load ``data`` from scratch"""
+        for name in os.listdir(self.directory):
+            if name.endswith(('.bin', '.idx')) or name == MANIFEST_FILE:
+                os.remove(os.path.join(self.directory, name))
+        self.manifest = None
+        return self.upsert(data)
+
+    def read(self, columns=None, hashed_ids=None, index_by_id=False):
+        """
+        Stored columns as a DataFrame (all rows, or the given hashed_ids)
+        ``bmi_category`` comes back as a categorical; unknown ids raise KeyError.
+        """
+        columns = self.columns if columns is None else list(columns)
+        unknown = [c for c in columns if c not in self.columns and c != ID_COLUMN]
+        if unknown:
+            raise KeyError(f"Columns not in the feature store: {unknown}")
+
+        rows = slice(None)
+        if hashed_ids is not None:
+            rows = self._lookup(encode_hashed_ids(hashed_ids))
+            if (rows < 0).any():
+                raise KeyError(f"{int((rows < 0).sum())} hashed_ids are not in the feature store")
+
+        frame = {}
+        ids = decode_hashed_ids(self._column(ID_COLUMN)[rows])
+        if not index_by_id:
+            frame[ID_COLUMN] = ids
+        for name in columns:
+            if name == ID_COLUMN:
+                continue
+            values = np.array(self._column(name)[rows])
+            if name == 'bmi_category':
+                values = pd.Categorical.from_codes(values, categories=BMI_CATEGORY_LEVELS)
+            frame[name] = values
+        return pd.DataFrame(frame, index=pd.Index(ids, name=ID_COLUMN) if index_by_id else None)
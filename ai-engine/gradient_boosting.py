@@ -0,0 +1,139 @@
+"""
+Histogram Gradient Boosting Backend with Shared Feature Binning
+NIW Evidence: Multi-Million-Patient Model Training
+
+Evidence:
+- Clinical features are quantile-binned once per training run into uint8 codes,
+  with a reserved code for missing values
+- All complication models train on the same binned matrix (8x smaller than float64)
+- Boosting uses scikit-learn's histogram gradient boosting, whose cost grows
+  with bins rather than with distinct feature values
+- Models bin raw features themselves at prediction time, so they drop into
+  the engine's single-patient, batch and joblib persistence paths unchanged
+"""
+
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+MAX_BINS = 255
+# Observed values bin to 0..n_bins-1, so the top uint8 code is free for NaN
+MISSING_CODE = 255
+
+
+class FeatureBinner:
+    """
+    Per-feature quantile bin edges shared across complication models
+    Features with at most ``n_bins`` distinct values get one bin per value;
+    missing values get MISSING_CODE rather than sharing a bin with observed ones.
+    """
+
+    def __init__(self, n_bins=MAX_BINS, subsample=200_000, seed=42):
+        if not 2 <= n_bins <= MAX_BINS:
+            raise ValueError(f"n_bins must be between 2 and {MAX_BINS}")
+        self.n_bins = n_bins
+        self.subsample = subsample
+        self.seed = seed
+        self.bin_edges = None
+
+    def fit(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) > self.subsample:
+            rng = np.random.default_rng(self.seed)
+            X = X[rng.choice(len(X), self.subsample, replace=False)]
+
+        self.bin_edges = []
+        for column in X.T:
+            values = np.unique(column[~np.isnan(column)])
+            if len(values) <= self.n_bins:
+                edges = (values[:-1] + values[1:]) / 2
+            else:
+                quantiles = np.percentile(column[~np.isnan(column)], np.linspace(0, 100, self.n_bins + 1)[1:-1])
+                edges = np.unique(quantiles)
+            self.bin_edges.append(edges)
+        return self
+
+    def transform(self, X):
+        """uint8 bin codes; NaN gets MISSING_CODE"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        codes = np.empty(X.shape, dtype=np.uint8)
+        for j, edges in enumerate(self.bin_edges):
+            codes[:, j] = np.searchsorted(edges, X[:, j], side='right')
+        codes[np.isnan(X)] = MISSING_CODE
+        return codes
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+
+class BinnedFeatures:
+    """Feature matrix already binned by a FeatureBinner, passed straight to boosting"""
+
+    def __init__(self, codes):
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def take(self, positions):
+        return BinnedFeatures(self.codes[positions])
+
+
+class BinnedGradientBoostingClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Histogram gradient boosting over shared FeatureBinner codes
+    NIW Technical Evidence: Scalable Gradient-Boosted Risk Models
+
+    ``fit`` and ``predict_proba`` accept raw features (binned on the fly) or
+    a BinnedFeatures matrix produced once for every complication.
+    """
+
+    def __init__(self, binner=None, max_iter=200, learning_rate=0.1, max_leaf_nodes=31,
+                 min_samples_leaf=20, l2_regularization=0.0, class_weight='balanced',
+                 random_state=42, n_jobs=None):
+        self.binner = binner
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_samples_leaf = min_samples_leaf
+        self.l2_regularization = l2_regularization
+        self.class_weight = class_weight
+        self.random_state = random_state
+        self.n_jobs = n_jobs  # accepted for engine compatibility; threads follow OpenMP
+
+    def _codes(self, X):
+        if isinstance(X, BinnedFeatures):
+            codes = X.codes
+        else:
+            if hasattr(X, 'to_numpy'):
+                X = X.to_numpy(dtype=np.float64)
+            codes = self.binner_.transform(X)
+        # Boosting sees missing codes as NaN and learns which side they go to
+        values = codes.astype(np.float64)
+        values[codes == MISSING_CODE] = np.nan
+        return values
+
+    def fit(self, X, y):
+        self.binner_ = self.binner
+        if self.binner_ is None:
+            if isinstance(X, BinnedFeatures):
+                raise ValueError("Binned features require the FeatureBinner that produced them")
+            self.binner_ = FeatureBinner().fit(X.to_numpy(dtype=np.float64) if hasattr(X, 'to_numpy') else X)
+        # Codes have at most MAX_BINS distinct values, so boosting maps them one-to-one
+        self.booster_ = HistGradientBoostingClassifier(
+            max_iter=self.max_iter, learning_rate=self.learning_rate,
+            max_leaf_nodes=self.max_leaf_nodes, min_samples_leaf=self.min_samples_leaf,
+            l2_regularization=self.l2_regularization, class_weight=self.class_weight,
+            max_bins=MAX_BINS, early_stopping=False, random_state=self.random_state
+        )
+        self.booster_.fit(self._codes(X), np.asarray(y))
+        self.classes_ = self.booster_.classes_
+        return self
+
+    def predict_proba(self, X):
+        return self.booster_.predict_proba(self._codes(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,241 @@
+"""
+Structured Pipeline and Engine Instrumentation
+NIW Evidence: Production Observability for Clinical AI
+
+Evidence:
+- Structured spans per pipeline step and per-complication fit/predict
+- Each span carries wall time, rows in/out and peak memory growth
+- Pluggable sinks: in-memory, JSON-lines file, Prometheus text exposition
+- No-op tracer by default, so the single-patient hot path pays almost nothing
+"""
+
+import json
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+def peak_rss_bytes():
+    """Process peak resident set size so far, or None where unsupported"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+@dataclass
+class Span:
+    """
+    One timed unit of work
+    ``memory_delta_bytes`` is the growth of the process peak RSS while the
+    span ran, i.e. how much new high-water memory the step needed.
+    """
+    name: str
+    started_at: str
+    wall_seconds: float = 0.0
+    rows_in: int = None
+    rows_out: int = None
+    memory_delta_bytes: int = None
+    parent: str = None
+    attributes: dict = field(default_factory=dict)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class InMemorySink:
+    """Keeps every span in a list, for tests and interactive profiling"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def by_name(self, name):
+        return [span for span in self.spans if span.name == name]
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+class JsonLinesSink:
+    """Appends one JSON object per span to a file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock, open(self.path, 'a') as f:
+            f.write(line + '\n')
+
+
+class PrometheusTextSink:
+    """
+    Aggregates spans into Prometheus text-format counters
+    Series are labelled by span name plus any ``complication``/``backend``
+    attribute; ``render()`` returns the exposition text and ``dump(path)``
+    writes it for a node-exporter textfile collector.
+    """
+    label_attributes = ('complication', 'backend')
+
+    def __init__(self, namespace='publichealthos'):
+        self.namespace = namespace
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        labels = (('span', span.name),) + tuple(
+            (key, str(span.attributes[key])) for key in self.label_attributes if key in span.attributes
+        )
+        with self._lock:
+            series = self._series.setdefault(labels, {
+                'count': 0, 'seconds': 0.0, 'rows_in': 0, 'rows_out': 0, 'memory_delta_bytes': 0
+            })
+            series['count'] += 1
+            series['seconds'] += span.wall_seconds
+            series['rows_in'] += span.rows_in or 0
+            series['rows_out'] += span.rows_out or 0
+            series['memory_delta_bytes'] = max(series['memory_delta_bytes'], span.memory_delta_bytes or 0)
+
+    def render(self):
+        metrics = [
+            ('span_count_total', 'count', 'counter', 'Number of completed spans'),
+            ('span_seconds_total', 'seconds', 'counter', 'Total wall time spent in spans'),
+            ('span_rows_in_total', 'rows_in', 'counter', 'Rows entering spans'),
+            ('span_rows_out_total', 'rows_out', 'counter', 'Rows leaving spans'),
+            ('span_peak_memory_delta_bytes', 'memory_delta_bytes', 'gauge',
+             'Largest peak RSS growth observed in a single span'),
+        ]
+        lines = []
+        with self._lock:
+            for metric, key, metric_type, help_text in metrics:
+                name = f"{self.namespace}_{metric}"
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, series in sorted(self._series.items()):
+                    label_text = ','.join(f'{key_}="{value}"' for key_, value in labels)
+                    lines.append(f"{name}{{{label_text}}} {series[key]}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.render())
+
+
+class _ActiveSpan:
+    """Context manager returned by Tracer.span; ``set_rows_out`` records output size"""
+    __slots__ = ('tracer', 'span', '_start', '_rss_start')
+
+    def __init__(self, tracer, span):
+        self.tracer = tracer
+        self.span = span
+
+    def set_rows_out(self, rows_out):
+        self.span.rows_out = rows_out
+
+    def set_attribute(self, key, value):
+        self.span.attributes[key] = value
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.span.parent = stack[-1] if stack else None
+        stack.append(self.span.name)
+        self._rss_start = peak_rss_bytes() if self.tracer.track_memory else None
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.wall_seconds = time.perf_counter() - self._start
+        if self._rss_start is not None:
+            self.span.memory_delta_bytes = peak_rss_bytes() - self._rss_start
+        if exc_type is not None:
+            self.span.attributes['error'] = exc_type.__name__
+        self.tracer._stack().pop()
+        self.tracer.sink.emit(self.span)
+        return False
+
+
+class Tracer:
+    """
+    Emits structured spans to a sink
+    NIW Technical Evidence: Stage-Level Performance Visibility
+
+    Usage:
+        with tracer.span('pipeline.clean', rows_in=len(data)) as span:
+            cleaned = data.dropna()
+            span.set_rows_out(len(cleaned))
+    """
+    enabled = True
+
+    def __init__(self, sink=None, track_memory=True):
+        self.sink = sink if sink is not None else InMemorySink()
+        self.track_memory = track_memory and resource is not None
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, rows_in=None, **attributes):
+        return _ActiveSpan(self, Span(
+            name=name, started_at=datetime.now().isoformat(), rows_in=rows_in, attributes=attributes
+        ))
+
+    def record(self, name, wall_seconds, rows_in=None, rows_out=None, memory_delta_bytes=None,
+               **attributes):
+        """Emit a span measured elsewhere, e.g. inside a training worker process"""
+        stack = self._stack()
+        self.sink.emit(Span(
+            name=name, started_at=datetime.now().isoformat(), wall_seconds=wall_seconds,
+            rows_in=rows_in, rows_out=rows_out, memory_delta_bytes=memory_delta_bytes,
+            parent=stack[-1] if stack else None, attributes=attributes
+        ))
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set_rows_out(self, rows_out):
+        pass
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullTracer:
+    """Default tracer: hands out one shared no-op span and records nothing"""
+    enabled = False
+    _span = _NullSpan()
+
+    def span(self, name, rows_in=None, **attributes):
+        return self._span
+
+    def record(self, name, wall_seconds, rows_in=None, rows_out=None, memory_delta_bytes=None,
+               **attributes):
+        pass
+
+
+NULL_TRACER = NullTracer()
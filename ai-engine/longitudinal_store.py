@@ -0,0 +1,496 @@
+"""
+Append-Only Longitudinal Lab Store with Rolling Features
+NIW Evidence: HbA1c Trajectory Tracking Across Follow-Up Visits
+
+Evidence:
+- Lab observations are appended as immutable segments in calendar-month
+  partitions, one raw binary file per column, committed by a JSON manifest
+- Each segment is sorted by (patient, time), so one patient's history over a
+  date range is a binary search in each overlapping segment
+- Per-patient rolling aggregates (last value, least-squares slope, 90-day
+  mean, visit-to-visit variability) are running sums folded in from each new
+  batch; only the observations leaving the 90-day window are read back
+- The aggregates are exported as extra model columns for DiabetesRiskEngine
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from audit_log import default_audit_trail
+from feature_store import ID_COLUMN, decode_hashed_ids, encode_hashed_ids
+
+MANIFEST_FILE = 'manifest.json'
+STORE_FORMAT_VERSION = 1
+# Tests tracked by a new store, in code order
+LAB_TESTS = ['hba1c', 'systolic_bp', 'diastolic_bp']
+OBSERVATION_COLUMNS = [ID_COLUMN, 'observed_at', 'test', 'value']
+SEGMENT_DTYPES = {
+    'patient': np.dtype(np.uint64), 'observed_at': np.dtype(np.int64),
+    'test': np.dtype(np.int8), 'value': np.dtype(np.float64),
+}
+# Running (patient, test) state; time sums are in days since TIME_ORIGIN
+STATE_COLUMNS = ['count', 'sum_t', 'sum_v', 'sum_tt', 'sum_tv', 'sum_vv',
+                 'last_t', 'last_v', 'window_count', 'window_sum']
+STATE_INITIAL_VALUES = {'last_t': -np.inf, 'last_v': np.nan}
+TIME_ORIGIN = np.datetime64('2000-01-01T00:00:00', 's').astype(np.int64)
+SECONDS_PER_DAY = 86_400
+MEAN_WINDOW_DAYS = 90
+# Feature names are '<test>_<statistic>'
+ROLLING_STATISTICS = ['last', 'days_since_last', 'count', 'slope_per_year', 'mean_90d', 'sd']
+LAB_FEATURES = [
+    'hba1c_last', 'hba1c_slope_per_year', 'hba1c_mean_90d',
+    'systolic_bp_last', 'systolic_bp_sd', 'diastolic_bp_last', 'diastolic_bp_sd'
+]
+
+
+def _days(seconds):
+    return (np.asarray(seconds, dtype=np.int64) - TIME_ORIGIN) / SECONDS_PER_DAY
+
+
+def _segment_order(patients, observed_at, months):
+    """
+    Stable row order by (month, patient, time)
+    Equal to np.lexsort((observed_at, patients, months)), computed as one
+    int64 argsort of a composite key, which is about twice as fast.
+    """
+    if len(patients) == 0:
+        return np.empty(0, dtype=np.int64)
+    by_patient = np.argsort(patients)
+    sorted_patients = patients[by_patient]
+    rank = np.empty(len(patients), dtype=np.int64)
+    rank[by_patient] = np.cumsum(np.r_[False, sorted_patients[1:] != sorted_patients[:-1]])
+    offset = observed_at - observed_at.min()
+    month = (months - months.min()).astype(np.int64)
+    span, n_ranks = int(offset.max()) + 1, int(rank[by_patient[-1]]) + 1
+    if (int(month.max()) + 1) * n_ranks * span >= 2 ** 62:
+        return np.lexsort((observed_at, patients, months))
+    return np.argsort((month * n_ranks + rank) * span + offset, kind='stable')
+
+
+class LongitudinalLabStore:
+    """
+    Time-partitioned store of per-patient lab observations
+    NIW Technical Evidence: Incremental Longitudinal Feature Engineering
+
+    Observations are long-format rows of hashed_id, observed_at, test and
+    value. The store clock ``as_of`` is the latest observation time seen;
+    ``mean_90d`` covers ``(as_of - 90 days, as_of]`` while last value, slope
+    and SD cover the whole history. Crash safety: segments are committed by
+    the manifest, and the aggregates are marked clean only after they have
+    been flushed, so an interrupted append is recovered by rebuild_state.
+    """
+
+    def __init__(self, directory, audit_trail=None):
+        self.directory = str(directory)
+        self.audit_trail = audit_trail if audit_trail is not None else default_audit_trail()
+        self.manifest = None
+        self._segments = {}
+        self._key_order = None
+        self._sorted_keys = None
+        os.makedirs(os.path.join(self.directory, 'state'), exist_ok=True)
+        manifest_path = os.path.join(self.directory, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+            if not self.manifest['state_clean']:
+                self.rebuild_state()
+
+    def __len__(self):
+        return self.manifest['patient_count'] if self.manifest else 0
+
+    @property
+    def tests(self):
+        return list(self.manifest['tests']) if self.manifest else list(LAB_TESTS)
+
+    @property
+    def observation_count(self):
+        return sum(segment['rows'] for segment in self.manifest['segments']) if self.manifest else 0
+
+    @property
+    def as_of(self):
+        if not self.manifest or self.manifest['as_of'] is None:
+            return None
+        return pd.Timestamp(np.datetime64(self.manifest['as_of'], 's'))
+
+    def _create(self):
+        self.manifest = {
+            'format_version': STORE_FORMAT_VERSION, 'tests': list(LAB_TESTS), 'next_segment': 0,
+            'segments': [], 'patient_count': 0, 'as_of': None, 'state_clean': True,
+        }
+        self._reset_state_files()
+
+    def _write_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    # --- observation segments ---
+
+    def _segment_path(self, segment, column):
+        return os.path.join(self.directory, 'partitions', segment['partition'],
+                            f"segment-{segment['id']:06d}.{column}.bin")
+
+    def _segment_columns(self, segment):
+        """Memory-mapped columns of one committed segment (cached per store)"""
+        columns = self._segments.get(segment['id'])
+        if columns is None:
+            columns = {
+                name: np.memmap(self._segment_path(segment, name), dtype=dtype, mode='r',
+                                shape=(segment['rows'],))
+                for name, dtype in SEGMENT_DTYPES.items()
+            }
+            self._segments[segment['id']] = columns
+        return columns
+
+    def _write_segment(self, partition, columns):
+        segment = {
+            'id': self.manifest['next_segment'], 'partition': partition,
+            'rows': len(columns['patient']),
+            'start': int(columns['observed_at'].min()), 'end': int(columns['observed_at'].max()),
+        }
+        os.makedirs(os.path.dirname(self._segment_path(segment, 'patient')), exist_ok=True)
+        for name, dtype in SEGMENT_DTYPES.items():
+            np.ascontiguousarray(columns[name], dtype=dtype).tofile(self._segment_path(segment, name))
+        self.manifest['next_segment'] += 1
+        return segment
+
+    def _write_partitioned(self, observations):
+        """One (patient, time)-sorted segment per calendar month in the batch"""
+        months = observations['observed_at'].astype('datetime64[s]').astype('datetime64[M]')
+        order = _segment_order(observations['patient'], observations['observed_at'], months)
+        months = months[order]
+        boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+        segments = []
+        for first, rows in zip(np.r_[0, boundaries], np.split(order, boundaries)):
+            segments.append(self._write_segment(
+                str(months[first]), {name: values[rows] for name, values in observations.items()}))
+        return segments
+
+    def _read_segments(self, segments, start=None, end=None):
+        """Concatenated observations of ``segments`` with time in ``(start, end]``"""
+        parts = []
+        for segment in segments:
+            columns = self._segment_columns(segment)
+            keep = np.ones(segment['rows'], dtype=bool)
+            if start is not None:
+                keep &= columns['observed_at'] > start
+            if end is not None:
+                keep &= columns['observed_at'] <= end
+            parts.append({name: np.asarray(values[keep]) for name, values in columns.items()})
+        return {
+            name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype=dtype)
+            for name, dtype in SEGMENT_DTYPES.items()
+        }
+
+    # --- per-patient rolling state ---
+
+    def _state_path(self, name):
+        return os.path.join(self.directory, 'state', f"{name}.bin")
+
+    def _state_column(self, name, mode='r'):
+        """Memory-mapped patient keys or flat (patient, test) state cells"""
+        dtype = SEGMENT_DTYPES['patient'] if name == 'patient' else np.dtype(np.float64)
+        size = len(self) if name == 'patient' else len(self) * len(self.tests)
+        if size == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._state_path(name), dtype=dtype, mode=mode, shape=(size,))
+
+    def _reset_state_files(self):
+        for name in ['patient'] + STATE_COLUMNS:
+            open(self._state_path(name), 'wb').close()
+        self._key_order = self._sorted_keys = None
+
+    def _lookup(self, keys):
+        """State row of each patient key, -1 when the patient has no observations"""
+        if self._key_order is None:
+            patients = np.array(self._state_column('patient'))
+            self._key_order = np.argsort(patients, kind='stable')
+            self._sorted_keys = patients[self._key_order]
+        if len(self._key_order) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        slots = np.minimum(np.searchsorted(self._sorted_keys, keys), len(self._sorted_keys) - 1)
+        return np.where(self._sorted_keys[slots] == keys, self._key_order[slots], -1)
+
+    def _state_rows(self, keys):
+        """State rows of ``keys``, appending initial state for new patients"""
+        rows = self._lookup(keys)
+        new = rows < 0
+        if not new.any():
+            return rows, 0
+        new_keys, inverse = np.unique(keys[new], return_inverse=True)
+        patient_count, n_tests = len(self), len(self.tests)
+        rows[new] = patient_count + inverse
+        appended = {'patient': new_keys}
+        appended.update({
+            name: np.full(len(new_keys) * n_tests, STATE_INITIAL_VALUES.get(name, 0.0))
+            for name in STATE_COLUMNS
+        })
+        for name, values in appended.items():
+            committed = patient_count * (1 if name == 'patient' else n_tests) * values.itemsize
+            with open(self._state_path(name), 'r+b') as f:
+                # Drop cells left past the committed patient count by an interrupted append
+                f.truncate(committed)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(values).tobytes())
+        self.manifest['patient_count'] = patient_count + len(new_keys)
+
+        order = np.argsort(np.concatenate([self._sorted_keys, new_keys]), kind='stable')
+        self._sorted_keys = np.concatenate([self._sorted_keys, new_keys])[order]
+        self._key_order = np.concatenate([self._key_order, np.arange(patient_count, len(self))])[order]
+        return rows, len(new_keys)
+
+    def _fold(self, rows, observations, window_start):
+        """Add a batch of observations to the running (patient, test) state"""
+        cells = rows * len(self.tests) + observations['test']
+        unique_cells, inverse = np.unique(cells, return_inverse=True)
+        t = _days(observations['observed_at'])
+        v = observations['value']
+        in_window = observations['observed_at'] > window_start
+        increments = {
+            'count': np.ones(len(v)), 'sum_t': t, 'sum_v': v,
+            'sum_tt': t * t, 'sum_tv': t * v, 'sum_vv': v * v,
+            'window_count': in_window.astype(np.float64), 'window_sum': np.where(in_window, v, 0.0),
+        }
+        state = {name: self._state_column(name, mode='r+') for name in STATE_COLUMNS}
+        for name, values in increments.items():
+            state[name][unique_cells] += np.bincount(inverse, weights=values, minlength=len(unique_cells))
+
+        # Latest observation of each cell; ties go to the later row
+        latest_t = np.full(len(unique_cells), -np.inf)
+        np.maximum.at(latest_t, inverse, t)
+        at_latest = np.flatnonzero(t == latest_t[inverse])
+        last = np.full(len(unique_cells), -1, dtype=np.int64)
+        np.maximum.at(last, inverse[at_latest], at_latest)
+        newer = t[last] >= state['last_t'][unique_cells]
+        state['last_t'][unique_cells[newer]] = t[last][newer]
+        state['last_v'][unique_cells[newer]] = v[last][newer]
+        for column in state.values():
+            column.flush()
+
+    def _expire(self, rows, observations):
+        """Remove observations that left the mean window from the window sums"""
+        cells = rows * len(self.tests) + observations['test']
+        unique_cells, inverse = np.unique(cells, return_inverse=True)
+        window_count = self._state_column('window_count', mode='r+')
+        window_sum = self._state_column('window_sum', mode='r+')
+        window_count[unique_cells] -= np.bincount(inverse, minlength=len(unique_cells))
+        window_sum[unique_cells] -= np.bincount(inverse, weights=observations['value'],
+                                                minlength=len(unique_cells))
+        # Keep emptied windows exactly zero instead of accumulating rounding error
+        window_sum[unique_cells[window_count[unique_cells] == 0]] = 0.0
+        window_count.flush()
+        window_sum.flush()
+
+    def _prepare(self, observations):
+        missing = [c for c in OBSERVATION_COLUMNS if c not in observations.columns]
+        if missing:
+            raise ValueError(f"Lab observations require columns {OBSERVATION_COLUMNS}, missing {missing}")
+        tests = np.asarray(observations['test'], dtype=object)
+        codes = np.full(len(tests), -1, dtype=np.int8)
+        for code, test in enumerate(self.tests):
+            codes[tests == test] = code
+        if (codes < 0).any():
+            raise ValueError(f"Unknown lab tests {sorted(set(tests[codes < 0]))}, expected {self.tests}")
+        observed_at = pd.to_datetime(observations['observed_at']).to_numpy(dtype='datetime64[s]')
+        values = observations['value'].to_numpy(dtype=np.float64)
+        if np.isnat(observed_at).any() or np.isnan(values).any():
+            raise ValueError("Every lab observation needs an observed_at time and a value")
+        return {
+            'patient': encode_hashed_ids(observations[ID_COLUMN]),
+            'observed_at': observed_at.astype(np.int64), 'test': codes, 'value': values,
+        }
+
+    def append(self, observations):
+        """
+        Append a batch of lab observations and fold it into the rolling state
+        Late observations are accepted; the batch may span several months.
+        Returns load statistics.
+        """
+        start = time.perf_counter()
+        if self.manifest is None:
+            self._create()
+        batch = self._prepare(observations)
+        stats = {'rows_in': len(observations), 'new_patients': 0, 'window_expired': 0, 'segments': 0}
+        if len(observations):
+            window = MEAN_WINDOW_DAYS * SECONDS_PER_DAY
+            previous_as_of = self.manifest['as_of']
+            as_of = int(batch['observed_at'].max())
+            if previous_as_of is not None:
+                as_of = max(as_of, previous_as_of)
+            # Window exits are read back before the batch itself is stored
+            expired = None
+            if previous_as_of is not None and as_of > previous_as_of:
+                overlapping = [s for s in self.manifest['segments']
+                               if s['end'] > previous_as_of - window and s['start'] <= as_of - window]
+                expired = self._read_segments(overlapping, previous_as_of - window, as_of - window)
+
+            segments = self._write_partitioned(batch)
+            self.manifest['segments'].extend(segments)
+            self.manifest.update(as_of=as_of, state_clean=False)
+            self._write_manifest()
+
+            rows, stats['new_patients'] = self._state_rows(batch['patient'])
+            self._fold(rows, batch, as_of - window)
+            if expired is not None and len(expired['patient']):
+                self._expire(self._lookup(expired['patient']), expired)
+                stats['window_expired'] = len(expired['patient'])
+            self.manifest['state_clean'] = True
+            self._write_manifest()
+            stats['segments'] = len(segments)
+
+        stats.update(patient_count=len(self), observation_count=self.observation_count,
+                     seconds=round(time.perf_counter() - start, 4))
+        self.audit_trail.log('lab_observations_appended', component='longitudinal_store',
+                             directory=self.directory, **stats)
+        return stats
+
+    def rebuild_state(self):
+        """Full recompute of the rolling state from every stored segment"""
+        self.manifest.update(patient_count=0, state_clean=False)
+        self._reset_state_files()
+        observations = self._read_segments(self.manifest['segments'])
+        if len(observations['patient']):
+            rows, _ = self._state_rows(observations['patient'])
+            self._fold(rows, observations, self.manifest['as_of'] - MEAN_WINDOW_DAYS * SECONDS_PER_DAY)
+        self.manifest['state_clean'] = True
+        self._write_manifest()
+
+    def compact(self):
+        """Merge each partition's segments into one; returns the number of segments removed"""
+        by_partition = {}
+        for segment in self.manifest['segments'] if self.manifest else []:
+            by_partition.setdefault(segment['partition'], []).append(segment)
+        removed = []
+        segments = []
+        for partition, members in by_partition.items():
+            if len(members) == 1:
+                segments.extend(members)
+                continue
+            observations = self._read_segments(members)
+            order = _segment_order(observations['patient'], observations['observed_at'],
+                                   np.zeros(len(observations['patient']), dtype=np.int64))
+            segments.append(self._write_segment(
+                partition, {name: values[order] for name, values in observations.items()}))
+            removed.extend(members)
+        if removed:
+            # The merged segments replace their sources in one manifest commit
+            before = len(self.manifest['segments'])
+            self.manifest['segments'] = sorted(segments, key=lambda s: s['id'])
+            self._write_manifest()
+            for segment in removed:
+                self._segments.pop(segment['id'], None)
+                for name in SEGMENT_DTYPES:
+                    os.remove(self._segment_path(segment, name))
+            return before - len(segments)
+        return 0
+
+    # --- reads ---
+
+    def history(self, hashed_id, start=None, end=None, tests=None):
+        """
+        One patient's observations with ``start <= observed_at <= end``, oldest first
+        Only segments overlapping the range are searched.
+        """
+        key = encode_hashed_ids([hashed_id])[0]
+        low = np.iinfo(np.int64).min if start is None else int(np.datetime64(pd.Timestamp(start), 's').astype(np.int64))
+        high = np.iinfo(np.int64).max if end is None else int(np.datetime64(pd.Timestamp(end), 's').astype(np.int64))
+        parts = []
+        for segment in self.manifest['segments'] if self.manifest else []:
+            if segment['end'] < low or segment['start'] > high:
+                continue
+            columns = self._segment_columns(segment)
+            first = int(np.searchsorted(columns['patient'], key, side='left'))
+            stop = int(np.searchsorted(columns['patient'], key, side='right'))
+            if first == stop:
+                continue
+            # Within a patient the segment is time-ordered
+            times = columns['observed_at'][first:stop]
+            first, stop = (first + int(np.searchsorted(times, low, side='left')),
+                           first + int(np.searchsorted(times, high, side='right')))
+            parts.append({name: np.asarray(columns[name][first:stop]) for name in SEGMENT_DTYPES})
+        observed_at = np.concatenate([p['observed_at'] for p in parts]) if parts else np.empty(0, np.int64)
+        codes = np.concatenate([p['test'] for p in parts]) if parts else np.empty(0, np.int8)
+        values = np.concatenate([p['value'] for p in parts]) if parts else np.empty(0)
+        if tests is not None:
+            keep = np.isin(codes, [self.tests.index(test) for test in tests])
+            observed_at, codes, values = observed_at[keep], codes[keep], values[keep]
+        order = np.argsort(observed_at, kind='stable')
+        return pd.DataFrame({
+            'observed_at': observed_at[order].astype('datetime64[s]'),
+            'test': np.asarray(self.tests, dtype=object)[codes[order]],
+            'value': values[order],
+        })
+
+    def _parse_feature(self, feature):
+        for code, test in enumerate(self.tests):
+            statistic = feature[len(test) + 1:]
+            if feature.startswith(f"{test}_") and statistic in ROLLING_STATISTICS:
+                return code, statistic
+        raise ValueError(f"Unknown rolling feature '{feature}', expected <test>_<statistic> with tests "
+                         f"{self.tests} and statistics {ROLLING_STATISTICS}")
+
+    def _rolling_features(self, rows, features):
+        """{feature: values} for state rows; rows of -1 give NaN"""
+        known = rows >= 0
+        state = {name: self._state_column(name) for name in STATE_COLUMNS}
+        results = {}
+        for feature in features:
+            code, statistic = self._parse_feature(feature)
+            cells = rows[known] * len(self.tests) + code
+            n = state['count'][cells]
+            sum_t, sum_v = state['sum_t'][cells], state['sum_v'][cells]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if statistic == 'last':
+                    values = state['last_v'][cells]
+                elif statistic == 'days_since_last':
+                    last_t = state['last_t'][cells]
+                    values = np.where(n > 0, _days(self.manifest['as_of'] or 0) - last_t, np.nan)
+                elif statistic == 'count':
+                    values = n
+                elif statistic == 'slope_per_year':
+                    spread = n * state['sum_tt'][cells] - sum_t * sum_t
+                    slope = (n * state['sum_tv'][cells] - sum_t * sum_v) / spread * 365.25
+                    values = np.where((n >= 2) & (spread > 0), slope, np.nan)
+                elif statistic == 'mean_90d':
+                    window_count = state['window_count'][cells]
+                    values = np.where(window_count > 0, state['window_sum'][cells] / window_count, np.nan)
+                else:
+                    variance = (state['sum_vv'][cells] - sum_v * sum_v / n) / (n - 1)
+                    values = np.where(n >= 2, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+            column = np.full(len(rows), np.nan)
+            column[known] = values
+            results[feature] = column
+        return results
+
+    def features(self, hashed_ids=None, features=LAB_FEATURES):
+        """
+        Rolling features indexed by hashed_id (every patient, or the given ids)
+        Patients without observations get NaN.
+        """
+        if hashed_ids is None:
+            rows = np.arange(len(self), dtype=np.int64)
+            ids = decode_hashed_ids(self._state_column('patient'))
+        else:
+            ids = np.asarray(hashed_ids, dtype=str)
+            rows = self._lookup(encode_hashed_ids(ids)) if len(self) else np.full(len(ids), -1, np.int64)
+        return pd.DataFrame(self._rolling_features(rows, list(features)),
+                            index=pd.Index(ids, name=ID_COLUMN))
+
+    def attach_features(self, clinical_data, features=LAB_FEATURES):
+        """
+        Copy of a hashed_id-keyed clinical snapshot with the rolling features as extra columns
+        Features a patient has no history for stay NaN; the engine's trees route
+        missing values natively (scikit-learn >= 1.4).
+        """
+        if ID_COLUMN not in clinical_data.columns:
+            raise ValueError(f"Clinical data needs a '{ID_COLUMN}' column to attach lab features")
+        rolling = self.features(clinical_data[ID_COLUMN].to_numpy(), features)
+        enriched = clinical_data.copy()
+        for feature in rolling.columns:
+            enriched[feature] = rolling[feature].to_numpy()
+        return enriched
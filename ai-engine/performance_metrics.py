@@ -1,15 +1,147 @@
 """
 Model Performance Tracking for FDA Submission
 NIW Evidence: Clinical Validation Framework
+
+Evidence:
+- Accuracy, sensitivity, specificity and AUC-ROC from predicted probabilities
+- Fully vectorized NumPy: one sort of the scores serves every metric
+- Bootstrap confidence intervals drawn as multinomial counts over distinct
+  (score, label) groups instead of materializing resampled rows
+- Resampling batches run across worker processes with per-batch seed streams,
+  so intervals are reproducible and independent of the worker count
 """
 
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CLINICAL_METRICS = ('accuracy', 'sensitivity', 'specificity', 'auc_roc')
+
+# Scores are snapped to this grid for bootstrapping when they have more
+# distinct values than the grid; point estimates always use exact scores
+BOOTSTRAP_SCORE_RESOLUTION = 1e-4
+BOOTSTRAP_BATCH_SIZE = 250
+
+
+def _score_groups(y_true, y_score):
+    """
+    Collapse rows into ascending distinct scores with per-score label counts
+    Returns (scores, counts) where counts[0] / counts[1] count negatives /
+    positives at each score.
+    """
+    y_true = np.asarray(y_true).astype(bool, copy=False)
+    scores, inverse = np.unique(np.asarray(y_score, dtype=np.float64), return_inverse=True)
+    counts = np.stack([
+        np.bincount(inverse[~y_true], minlength=len(scores)),
+        np.bincount(inverse[y_true], minlength=len(scores)),
+    ])
+    return scores, counts
+
+
+def _metrics_from_counts(counts, threshold_index):
+    """
+    Clinical metrics from (..., 2, n_scores) label counts over ascending scores
+    Scores at or beyond ``threshold_index`` are predicted positive.
+    """
+    negatives, positives = counts[..., 0, :], counts[..., 1, :]
+    n_negative = negatives.sum(axis=-1)
+    n_positive = positives.sum(axis=-1)
+    true_positive = positives[..., threshold_index:].sum(axis=-1)
+    true_negative = negatives[..., :threshold_index].sum(axis=-1)
+
+    # Each positive outranks the negatives at lower scores; ties count half
+    negatives_below = np.cumsum(negatives, axis=-1) - negatives
+    concordant = (positives * (negatives_below + 0.5 * negatives)).sum(axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'accuracy': (true_positive + true_negative) / (n_positive + n_negative),
+            'sensitivity': true_positive / n_positive,
+            'specificity': true_negative / n_negative,
+            'auc_roc': concordant / (n_positive.astype(np.float64) * n_negative),
+        }
+
+
+def _bootstrap_batch(counts, threshold_index, n_resamples, seed, batch_index):
+    """
+    One batch of bootstrap resamples; module-level so worker processes can run it
+    Resampling n rows with replacement is a multinomial draw over the groups.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(batch_index,)))
+    n_rows = int(counts.sum())
+    draws = rng.multinomial(n_rows, counts.ravel() / n_rows, size=n_resamples)
+    metrics = _metrics_from_counts(draws.reshape(n_resamples, 2, -1), threshold_index)
+    return np.column_stack([metrics[name] for name in CLINICAL_METRICS])
+
+
 class ModelValidator:
+    """
+    FDA-Oriented Clinical Performance Validation
+    NIW Technical Evidence: Statistically Grounded Model Evaluation
+    """
+
+    def __init__(self, threshold=0.5, n_workers=1, seed=42):
+        self.threshold = threshold
+        self.n_workers = n_workers
+        self.seed = seed
+
     def calculate_clinical_metrics(self, y_true, y_pred):
-        # FDA-required validation metrics
+        """
+        FDA-required validation metrics
+        ``y_pred`` holds positive-class probabilities (hard 0/1 labels also
+        work); scores >= threshold count as predicted positive.
+        """
+        scores, counts = _score_groups(y_true, y_pred)
+        threshold_index = np.searchsorted(scores, self.threshold, side='left')
+        metrics = _metrics_from_counts(counts, threshold_index)
+        return {name: round(float(metrics[name]), 4) for name in CLINICAL_METRICS}
+
+    def bootstrap_confidence_intervals(self, y_true, y_pred, n_resamples=1000, confidence=0.95):
+        """
+        Percentile bootstrap intervals for every clinical metric
+        NIW Evidence: Uncertainty Quantification for Regulatory Review
+
+        Returns {metric: (lower, upper)}.
+        """
+        y_score = np.asarray(y_pred, dtype=np.float64)
+        scores, counts = _score_groups(y_true, y_score)
+        if len(scores) > 1 / BOOTSTRAP_SCORE_RESOLUTION + 1:
+            # Snap to the grid without moving any score across the threshold
+            snapped = np.round(y_score / BOOTSTRAP_SCORE_RESOLUTION) * BOOTSTRAP_SCORE_RESOLUTION
+            above = y_score >= self.threshold
+            snapped[above] = np.maximum(snapped[above], self.threshold)
+            snapped[~above] = np.minimum(snapped[~above], np.nextafter(self.threshold, -np.inf))
+            scores, counts = _score_groups(y_true, snapped)
+        threshold_index = np.searchsorted(scores, self.threshold, side='left')
+
+        batch_sizes = [BOOTSTRAP_BATCH_SIZE] * (n_resamples // BOOTSTRAP_BATCH_SIZE)
+        if n_resamples % BOOTSTRAP_BATCH_SIZE:
+            batch_sizes.append(n_resamples % BOOTSTRAP_BATCH_SIZE)
+        args = [
+            [counts] * len(batch_sizes), [threshold_index] * len(batch_sizes), batch_sizes,
+            [self.seed] * len(batch_sizes), list(range(len(batch_sizes))),
+        ]
+        if self.n_workers > 1 and len(batch_sizes) > 1:
+            with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+                batches = list(pool.map(_bootstrap_batch, *args))
+        else:
+            batches = list(map(_bootstrap_batch, *args))
+        resampled = np.concatenate(batches)
+
+        tail = (1 - confidence) / 2 * 100
+        lower, upper = np.nanpercentile(resampled, [tail, 100 - tail], axis=0)
         return {
-            'accuracy': 0.92,
-            'sensitivity': 0.89,
-            'specificity': 0.94,
-            'auc_roc': 0.93
+            name: (round(float(low), 4), round(float(high), 4))
+            for name, low, high in zip(CLINICAL_METRICS, lower, upper)
         }
-      
+
+    def validate(self, y_true, y_pred, n_resamples=1000, confidence=0.95):
+        """Point metrics plus bootstrap confidence intervals"""
+        metrics = self.calculate_clinical_metrics(y_true, y_pred)
+        if n_resamples:
+            metrics['confidence_intervals'] = self.bootstrap_confidence_intervals(
+                y_true, y_pred, n_resamples, confidence
+            )
+            metrics['confidence_level'] = confidence
+            metrics['bootstrap_resamples'] = n_resamples
+        return metrics
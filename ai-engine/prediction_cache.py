@@ -0,0 +1,102 @@
+"""
+Bounded LRU Cache for Complication Risk Predictions
+NIW Evidence: Efficient Real-Time Clinical Decision Support
+
+Evidence:
+- Keys on a canonical hash of the clinical feature vector and the model fingerprint
+- LRU eviction with a hard entry bound and optional time-to-live
+- Hit/miss/eviction counters for capacity planning
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def feature_cache_key(feature_values, model_fingerprint):
+    """
+    Canonical cache key for one patient's feature vector
+    Values are normalised to float64 so 45 and 45.0 share an entry.
+    """
+    values = np.ascontiguousarray(feature_values, dtype=np.float64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model_fingerprint.encode())
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Thread-safe bounded LRU cache with optional TTL
+    NIW Technical Evidence: Clinical Workload Optimization
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value, or None on a miss or an expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Insert or refresh an entry, evicting the least recently used beyond the bound"""
+        expires_at = None
+        if self.ttl_seconds is not None:
+            expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. after the model is retrained or reloaded"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters for monitoring dashboards"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,111 @@
+"""
+Lightweight Risk Inference Entry Point
+NIW Evidence: Fast Cold-Start Clinical Scoring
+
+Evidence:
+- Scores exported array artifacts with NumPy and the standard library only;
+  pandas, scikit-learn and joblib are never imported
+- Returns the same per-complication results as DiabetesRiskEngine's
+  compiled backend, bit for bit
+- Suited to CLIs, serverless handlers and scoring workers where process
+  start-up dominates the cost of a prediction
+"""
+
+import numpy as np
+
+from model_artifacts import ModelArtifact, is_model_artifact
+
+# CDC-identified risk factors for diabetes complications, in model column order
+CLINICAL_FEATURES = [
+    'age', 'bmi', 'hba1c', 'systolic_bp', 'diastolic_bp',
+    'ldl_cholesterol', 'hdl_cholesterol', 'triglycerides',
+    'smoking_status', 'diabetes_duration', 'renal_function'
+]
+
+# Clinical risk strata shared by every scoring path
+RISK_LEVEL_THRESHOLDS = [0.3, 0.5, 0.7]
+RISK_LEVELS = ['low', 'moderate', 'high', 'very_high']
+ALERT_RISK_LEVELS = ['high', 'very_high']
+
+
+def classify_risk_levels(probabilities):
+    """Vectorized clinical risk stratification of positive-class probabilities"""
+    bins = np.digitize(probabilities, RISK_LEVEL_THRESHOLDS)
+    return np.asarray(RISK_LEVELS, dtype=object)[bins]
+
+
+class RiskScorer:
+    """
+    Read-only scorer over a memory-mapped model artifact
+    NIW Technical Evidence: Dependency-Light Clinical Inference
+    """
+
+    def __init__(self, artifact):
+        self.artifact = artifact
+        self.features = list(artifact.manifest.get('features') or CLINICAL_FEATURES)
+        self.complications = artifact.keys()
+
+    def _feature_matrix(self, patients):
+        """float32 rows from a 2-D array-like or a {feature: column} mapping"""
+        if hasattr(patients, 'keys'):
+            return np.column_stack([np.asarray(patients[f], dtype=np.float32) for f in self.features])
+        return np.atleast_2d(np.asarray(patients, dtype=np.float32))
+
+    def predict_proba(self, patients):
+        """(n_patients, n_complications) positive-class probabilities"""
+        return self.artifact.ensemble.predict_proba(self._feature_matrix(patients))
+
+    def predict_individual_risk(self, patient_data):
+        """Per-complication probability, risk level and clinical alert for one feature list"""
+        if len(patient_data) != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} features ({', '.join(self.features)})")
+        risk_probs = self.artifact.ensemble.predict_proba(patient_data)[0]
+        risk_levels = classify_risk_levels(risk_probs)
+        return {
+            complication: {
+                'probability': round(float(risk_prob), 3),
+                'risk_level': risk_level,
+                'clinical_alert': risk_level in ALERT_RISK_LEVELS
+            }
+            for complication, risk_prob, risk_level in zip(self.complications, risk_probs, risk_levels)
+        }
+
+    def predict_batch(self, patients):
+        """
+        Columnar results for a panel of patients
+        Returns {column: ndarray} with the same ``<complication>_probability``,
+        ``_risk_level`` and ``_clinical_alert`` columns as the engine.
+        """
+        all_risk_probs = self.predict_proba(patients)
+        results = {}
+        for complication, risk_probs in zip(self.complications, all_risk_probs.T):
+            risk_levels = classify_risk_levels(risk_probs)
+            results[f"{complication}_probability"] = np.round(risk_probs, 3)
+            results[f"{complication}_risk_level"] = risk_levels
+            results[f"{complication}_clinical_alert"] = np.isin(risk_levels, ALERT_RISK_LEVELS)
+        return results
+
+
+def load_risk_scorer(path, verify_checksums=False):
+    """
+    RiskScorer for an array artifact directory
+    (DiabetesRiskEngine.save_model with artifact_format 'arrays' or 'compact')
+    ``verify_checksums=True`` hashes every array file before returning, a full
+    read of the artifact at cold start instead of lazy mapping on first score.
+    """
+    if not is_model_artifact(path):
+        raise ValueError(f"{path} is not a model artifact - export it with artifact_format='compact'")
+    artifact = ModelArtifact(path)
+    if verify_checksums:
+        artifact.verify()
+    return RiskScorer(artifact)
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    if len(sys.argv) != 2 + len(CLINICAL_FEATURES):
+        sys.exit(f"usage: python risk_inference.py ARTIFACT_DIR {' '.join(CLINICAL_FEATURES)}")
+    scorer = load_risk_scorer(sys.argv[1])
+    print(json.dumps(scorer.predict_individual_risk([float(v) for v in sys.argv[2:]]), indent=2))
@@ -10,10 +10,130 @@ Evidence:
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-import joblib
 import json
+import hashlib
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from tree_inference import CompiledForestEnsemble
+from model_artifacts import ModelArtifact, export_model_artifact, is_model_artifact
+from prediction_cache import feature_cache_key
+from instrumentation import NULL_TRACER, peak_rss_bytes
+from audit_log import default_audit_trail
+from performance_metrics import ModelValidator
+from risk_inference import (
+    ALERT_RISK_LEVELS, CLINICAL_FEATURES, RISK_LEVEL_THRESHOLDS, RISK_LEVELS, classify_risk_levels
+)
+# scikit-learn, joblib and the tuning/boosting modules built on them are
+# imported where training or joblib persistence needs them, so scoring-only
+# processes start fast (see risk_inference for the NumPy-only entry point)
+
+# Clinical-grade forest settings, overridable per complication by tuning
+DEFAULT_FOREST_PARAMS = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_split': 20,
+}
+
+def _balanced_class_weight(y):
+    """Explicit equivalent of class_weight='balanced' for ``y`` (one dict per output when 2-D)"""
+    from sklearn.utils.class_weight import compute_class_weight
+    y = np.asarray(y)
+    if y.ndim == 2:
+        return [_balanced_class_weight(y[:, output]) for output in range(y.shape[1])]
+    classes = np.unique(y)
+    return dict(zip(classes.tolist(), compute_class_weight('balanced', classes=classes, y=y).tolist()))
+
+def _fit_and_score(model, X_train, y_train, X_test=None, y_test=None):
+    """
+    Fit one forest and time it; module-level so training workers can run it
+    Returns the fitted model, its holdout accuracy, wall/CPU fit timings
+    (plus the fitting process's peak RSS growth, None where unsupported) and
+    the holdout positive-class probabilities.
+    """
+    rss_start = peak_rss_bytes()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    model.fit(X_train, y_train)
+    if hasattr(model, 'estimators_') and model.class_weight == 'balanced':
+        # Freeze the weights this fit used, so warm-start updates keep them
+        model.set_params(class_weight=_balanced_class_weight(y_train))
+    timings = {
+        'wall_seconds': time.perf_counter() - wall_start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'cores': model.n_jobs or 1,
+        'memory_delta_bytes': peak_rss_bytes() - rss_start if rss_start is not None else None
+    }
+    
+    accuracy = holdout_scores = None
+    if X_test is not None:
+        # One predict_proba serves both model.score's accuracy and the clinical metrics
+        proba = model.predict_proba(X_test)
+        accuracy = float(np.mean(model.classes_[np.argmax(proba, axis=1)] == np.asarray(y_test)))
+        holdout_scores = proba[:, 1]
+    # Score single patients without thread-pool dispatch, and keep tree
+    # accumulation order deterministic for the compiled backend
+    model.set_params(n_jobs=None)
+    return model, accuracy, timings, holdout_scores
+
+def _update_model_digest(digest, obj):
+    """
+    Feed a canonical encoding of a fitted model into ``digest``
+    Unlike pickle, whose memo layout depends on object identity, the same
+    model hashes the same after every load and in every process.
+    """
+    if isinstance(obj, np.ndarray):
+        digest.update(f"ndarray:{obj.dtype.str}:{obj.shape}".encode())
+        if obj.dtype.names:
+            # Field by field: structured arrays (tree nodes) have uninitialized padding
+            for name in obj.dtype.names:
+                _update_model_digest(digest, obj[name])
+        elif obj.dtype.hasobject:
+            _update_model_digest(digest, obj.tolist())
+        else:
+            digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        digest.update(f"dict:{len(obj)}".encode())
+        for key in sorted(obj, key=repr):
+            digest.update(repr(key).encode())
+            _update_model_digest(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"{type(obj).__name__}:{len(obj)}".encode())
+        for item in obj:
+            _update_model_digest(digest, item)
+    elif obj is None or isinstance(obj, (str, bytes, bool, int, float, np.generic)):
+        digest.update(repr(obj).encode())
+    else:
+        state = obj.__getstate__() if hasattr(obj, '__getstate__') else getattr(obj, '__dict__', None)
+        digest.update(f"{type(obj).__module__}.{type(obj).__qualname__}".encode())
+        if state is None:
+            digest.update(pickle.dumps(obj, protocol=4))
+        else:
+            _update_model_digest(digest, state)
+
+class ComplicationOutputModel:
+    """
+    Single-complication view over a shared multi-output forest
+    Exposes the per-complication predict_proba/predict/score interface
+    """
+    
+    def __init__(self, forest, output_index):
+        self.forest = forest
+        self.output_index = output_index
+    
+    @property
+    def estimators_(self):
+        return self.forest.estimators_
+    
+    def predict_proba(self, X):
+        return self.forest.predict_proba(X)[self.output_index]
+    
+    def predict(self, X):
+        return self.forest.predict(X)[:, self.output_index]
+    
+    def score(self, X, y):
+        return float(np.mean(self.predict(X) == np.asarray(y)))
 
 class DiabetesRiskEngine:
     """
@@ -21,69 +141,415 @@ class DiabetesRiskEngine:
     NIW Technical Evidence: Advanced AI Implementation
     """
     
-    def __init__(self):
+    # Scoring backends selectable on the engine
+    inference_backends = ['sklearn', 'compiled']
+    # Model families selectable per complication in train_model
+    model_backends_available = ['random_forest', 'hist_gradient_boosting']
+    
+    def __init__(self, inference_backend='sklearn', prediction_cache=None, tracer=None,
+                 audit_trail=None, extra_features=None):
         self.model = None
-        # CDC-identified risk factors for diabetes complications
-        self.features = [
-            'age', 'bmi', 'hba1c', 'systolic_bp', 'diastolic_bp', 
-            'ldl_cholesterol', 'hdl_cholesterol', 'triglycerides',
-            'smoking_status', 'diabetes_duration', 'renal_function'
-        ]
+        self.model_fingerprint = None
+        self.set_inference_backend(inference_backend)
+        self._compiled_model = None
+        # Optional PredictionCache in front of single and batch scoring
+        self.prediction_cache = prediction_cache
+        # Fit/predict spans (see instrumentation.Tracer); no-op unless one is supplied
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        # Training/persistence events go to the queued audit trail, not stdout
+        self.audit_trail = audit_trail if audit_trail is not None else default_audit_trail()
+        # CDC-identified risk factors for diabetes complications, plus optional
+        # extra model columns (e.g. longitudinal_store.LAB_FEATURES)
+        self.features = list(CLINICAL_FEATURES) + list(extra_features or [])
         self.complication_types = [
             'retinopathy_risk', 'neuropathy_risk', 
             'nephropathy_risk', 'cardiovascular_risk'
         ]
         self.performance_metrics = {}
+        # Holdout (labels, probabilities) per complication from the last training run
+        self.holdout_predictions = {}
+        self.validator = ModelValidator()
+        # Number of incremental update_model rounds applied since train_model
+        self.update_rounds = 0
+        # Per-complication forest settings chosen by tune_hyperparameters
+        self.model_params = {}
+        # Model family per complication from the last train_model/load_model
+        self.model_backends = {}
         
-    def train_model(self, clinical_data):
+    def train_model(self, clinical_data, multi_output=False, n_workers=1, cores_per_fit=None,
+                    model_backend='random_forest'):
         """
         Train Random Forest model on clinical data
         NIW Evidence: Advanced ML Implementation
+        
+        With ``multi_output=True`` a single forest is fitted on all complication
+        labels at once, sharing one train/test split and one set of trees.
+        
+        ``n_workers`` fans the per-complication fits out over a process pool and
+        ``cores_per_fit`` sets each forest's ``n_jobs`` (default: an even share
+        of the machine's cores). Wall and CPU fit times are recorded per
+        complication in ``performance_metrics``.
+        
+        ``model_backend`` is 'random_forest', 'hist_gradient_boosting' or a
+        {complication: backend} mapping. Gradient-boosted complications share
+        one binned copy of the features (see gradient_boosting).
+        
+        ``clinical_data`` may also be a feature_store.ClinicalFeatureStore,
+        from which only the feature and label columns are read.
         """
+        clinical_data = self._clinical_frame(clinical_data, self.features + self.complication_types)
+        backends = self._resolve_model_backends(model_backend)
+        if multi_output and set(backends.values()) != {'random_forest'}:
+            raise ValueError("multi_output training supports the random_forest backend only")
+        
         try:
-            # Feature engineering based on clinical guidelines
-            X = clinical_data[self.features]
+            with self.tracer.span('engine.train', rows_in=len(clinical_data), multi_output=multi_output):
+                # Feature engineering based on clinical guidelines
+                X = clinical_data[self.features]
+                
+                if multi_output:
+                    models = self._train_multi_output(
+                        X, clinical_data[self.complication_types], cores_per_fit
+                    )
+                else:
+                    models = self._train_per_complication(
+                        X, clinical_data, n_workers, cores_per_fit, backends
+                    )
+            
+            self.model = models
+            self.model_backends = backends
+            for complication, backend in backends.items():
+                self.performance_metrics[complication]['model_backend'] = backend
+            self.update_rounds = 0
+            self._on_model_changed()
+            self.audit_trail.log(
+                'model_trained', component='risk_engine', model_fingerprint=self.model_fingerprint,
+                performance_metrics=dict(self.performance_metrics)
+            )
             
-            # Multi-target prediction for different complications
-            models = {}
-            for complication in self.complication_types:
-                y = clinical_data[complication]
+            return models
+            
+        except Exception as e:
+            self.audit_trail.log('model_training_failed', level='error', component='risk_engine', error=str(e))
+            return None
+    
+    def update_model(self, new_data, n_new_trees=20, max_trees=None):
+        """
+        Incrementally grow the trained forests with trees fitted on new data
+        NIW Evidence: Continuous Learning from Incoming Clinical Data
+        
+        Each forest is warm-started: ``n_new_trees`` trees are fitted on 80%
+        of ``new_data`` and appended to the existing ones, then the oldest
+        trees are retired so at most ``max_trees`` remain. Accuracy and
+        clinical metrics are refreshed on the other 20%, so the cost scales
+        with the new data rather than the full history.
+        """
+        if self.model is None:
+            return "Error: Model not trained"
+        if isinstance(self.model, ModelArtifact):
+            return "Error: Array artifacts are read-only - load a joblib model to update it"
+        if set(self.model_backends.values()) - {'random_forest'}:
+            return "Error: Incremental updates support random_forest complications only"
+        
+        try:
+            with self.tracer.span('engine.update', rows_in=len(new_data), n_new_trees=n_new_trees):
+                self.update_rounds += 1
+                # Fresh seeds each round, so new trees never repeat retired trees' bootstraps
+                round_seed = int(np.random.SeedSequence(42, spawn_key=(self.update_rounds,)).generate_state(1)[0])
+                X = new_data[self.features]
                 
+                forests = {}
+                for complication, model in self.model.items():
+                    forests.setdefault(id(getattr(model, 'forest', model)), []).append(complication)
+                for complications in forests.values():
+                    self._update_forest(X, new_data, complications, n_new_trees, max_trees, round_seed)
+            
+            self._on_model_changed()
+            self.audit_trail.log(
+                'model_updated', component='risk_engine', model_fingerprint=self.model_fingerprint,
+                update_round=self.update_rounds, new_records=len(new_data),
+                performance_metrics=dict(self.performance_metrics)
+            )
+            return self.model
+            
+        except Exception as e:
+            self.audit_trail.log('model_update_failed', level='error', component='risk_engine', error=str(e))
+            return f"Update error: {str(e)}"
+    
+    def _update_forest(self, X, new_data, complications, n_new_trees, max_trees, round_seed):
+        """Warm-start one (possibly shared multi-output) forest on new records"""
+        model = self.model[complications[0]]
+        shared = isinstance(model, ComplicationOutputModel)
+        forest = model.forest if shared else model
+        labels = new_data[complications] if shared else new_data[complications[0]]
+        from sklearn.model_selection import train_test_split
+        
+        stratify = labels if not shared else None
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, labels, test_size=0.2, random_state=42, stratify=stratify
+        )
+        
+        if isinstance(forest.class_weight, str):
+            # Forests saved before weights were frozen at training: freeze them now
+            forest.set_params(class_weight=_balanced_class_weight(y_train))
+        forest.set_params(
+            warm_start=True, n_estimators=len(forest.estimators_) + n_new_trees, random_state=round_seed
+        )
+        forest, accuracy, timings, holdout_scores = _fit_and_score(
+            forest, X_train, y_train, None if shared else X_test, None if shared else y_test
+        )
+        if max_trees is not None and len(forest.estimators_) > max_trees:
+            forest.estimators_ = forest.estimators_[-max_trees:]
+        forest.set_params(warm_start=False, n_estimators=len(forest.estimators_))
+        self._record_fit_span('multi_output' if shared else complications[0], X_train, timings)
+        
+        if shared:
+            all_proba = forest.predict_proba(X_test)
+        for complication in complications:
+            if shared:
+                output_index = self.model[complication].output_index
+                proba = all_proba[output_index]
+                complication_y_test = y_test[complication].to_numpy()
+                accuracy = float(np.mean(
+                    forest.classes_[output_index][np.argmax(proba, axis=1)] == complication_y_test
+                ))
+                holdout_scores = proba[:, 1]
+            else:
+                complication_y_test = y_test
+            self._record_performance(
+                complication, accuracy, X_train, X_test, timings, complication_y_test, holdout_scores
+            )
+            self.performance_metrics[complication]['trees'] = len(forest.estimators_)
+            self.performance_metrics[complication]['update_round'] = self.update_rounds
+    
+    def _train_per_complication(self, X, clinical_data, n_workers=1, cores_per_fit=None,
+                                backends=None):
+        """Fit one independent model per complication, optionally in parallel"""
+        n_workers = max(1, min(n_workers, len(self.complication_types)))
+        if cores_per_fit is None and n_workers > 1:
+            cores_per_fit = max(1, (os.cpu_count() or 1) // n_workers)
+        backends = backends or self._resolve_model_backends('random_forest')
+        from sklearn.model_selection import train_test_split
+        
+        binner = binned = None
+        if 'hist_gradient_boosting' in backends.values():
+            from gradient_boosting import BinnedFeatures, BinnedGradientBoostingClassifier, FeatureBinner
+            # Bin once; every gradient-boosted complication reuses the codes
+            raw_features = X.to_numpy(dtype=np.float64)
+            binner = FeatureBinner().fit(raw_features)
+            binned = BinnedFeatures(binner.transform(raw_features))
+        
+        # Multi-target prediction for different complications
+        fit_tasks = {}
+        for complication in self.complication_types:
+            y = clinical_data[complication]
+            
+            if backends[complication] == 'hist_gradient_boosting':
+                # Splitting positions reproduces the forest split row for row
+                train_rows, test_rows, y_train, y_test = train_test_split(
+                    np.arange(len(X)), y, test_size=0.2, random_state=42, stratify=y
+                )
+                X_train, X_test = binned.take(train_rows), binned.take(test_rows)
+                model = BinnedGradientBoostingClassifier(binner=binner, n_jobs=cores_per_fit)
+            else:
                 # Train-test split with stratification
                 X_train, X_test, y_train, y_test = train_test_split(
                     X, y, test_size=0.2, random_state=42, stratify=y
                 )
-                
-                # Clinical-grade model parameters
-                model = RandomForestClassifier(
-                    n_estimators=100,
-                    max_depth=10,
-                    min_samples_split=20,
-                    random_state=42,
-                    class_weight='balanced'  # Important for medical data
-                )
-                
-                model.fit(X_train, y_train)
-                models[complication] = model
-                
-                # Store performance metrics for NIW evidence
-                accuracy = model.score(X_test, y_test)
-                self.performance_metrics[complication] = {
-                    'accuracy': round(accuracy, 3),
-                    'features_used': len(self.features),
-                    'training_samples': len(X_train),
-                    'test_samples': len(X_test)
+                model = self._build_forest(n_jobs=cores_per_fit, params=self.model_params.get(complication))
+            fit_tasks[complication] = (model, X_train, y_train, X_test, y_test)
+        
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                futures = {
+                    complication: pool.submit(_fit_and_score, *task)
+                    for complication, task in fit_tasks.items()
                 }
+                fit_results = {complication: future.result() for complication, future in futures.items()}
+        else:
+            fit_results = {
+                complication: _fit_and_score(*task) for complication, task in fit_tasks.items()
+            }
+        
+        models = {}
+        for complication, (model, accuracy, timings, holdout_scores) in fit_results.items():
+            models[complication] = model
+            _, X_train, _, X_test, y_test = fit_tasks[complication]
             
-            self.model = models
-            print("✅ AI Model trained successfully - NIW Technical Proof")
-            print(f"📊 Model Performance: {json.dumps(self.performance_metrics, indent=2)}")
-            
-            return models
+            # Store performance metrics for NIW evidence
+            self._record_performance(
+                complication, accuracy, X_train, X_test, timings, y_test, holdout_scores
+            )
+            self._record_fit_span(complication, X_train, timings)
+        
+        return models
+    
+    def _train_multi_output(self, X, Y, cores_per_fit=None):
+        """Fit one shared forest over every complication label"""
+        from sklearn.model_selection import train_test_split
+        # Stratify on the joint label pattern when every pattern can be split
+        label_patterns = Y.astype(str).agg(''.join, axis=1)
+        stratify = label_patterns if label_patterns.value_counts().min() >= 2 else None
+        
+        X_train, X_test, Y_train, Y_test = train_test_split(
+            X, Y, test_size=0.2, random_state=42, stratify=stratify
+        )
+        
+        forest = self._build_forest(n_jobs=cores_per_fit)
+        forest, _, timings, _ = _fit_and_score(forest, X_train, Y_train)
+        self._record_fit_span('multi_output', X_train, timings)
+        
+        all_proba = forest.predict_proba(X_test)
+        models = {}
+        for output_index, complication in enumerate(self.complication_types):
+            model = ComplicationOutputModel(forest, output_index)
+            models[complication] = model
             
-        except Exception as e:
-            print(f"❌ Model training failed: {str(e)}")
-            return None
+            proba = all_proba[output_index]
+            y_test = Y_test[complication].to_numpy()
+            accuracy = float(np.mean(forest.classes_[output_index][np.argmax(proba, axis=1)] == y_test))
+            self._record_performance(
+                complication, accuracy, X_train, X_test, timings, y_test, proba[:, 1]
+            )
+        
+        return models
+    
+    def _build_forest(self, n_jobs=None, params=None):
+        """Clinical-grade model parameters, with optional tuned overrides"""
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(
+            **dict(DEFAULT_FOREST_PARAMS, **(params or {})),
+            random_state=42,
+            class_weight='balanced',  # Important for medical data
+            n_jobs=n_jobs
+        )
+    
+    def tune_hyperparameters(self, clinical_data, n_candidates=16, eta=3, n_workers=1,
+                             search_space=None, min_samples=2000, tolerance=0.001):
+        """
+        Successive-halving search of forest settings for each complication
+        NIW Evidence: Per-Complication Model Optimization
+        
+        Winning settings are kept in ``model_params`` and used by later
+        train_model calls (per-complication mode); they are also saved with
+        the model. ``n_workers`` processes evaluate candidates in parallel.
+        """
+        from model_tuning import SuccessiveHalvingTuner
+        with self.tracer.span('engine.tune', rows_in=len(clinical_data), n_candidates=n_candidates):
+            tuner = SuccessiveHalvingTuner(
+                DEFAULT_FOREST_PARAMS, search_space=search_space, n_candidates=n_candidates, eta=eta,
+                min_samples=min_samples, max_trees=DEFAULT_FOREST_PARAMS['n_estimators'],
+                tolerance=tolerance, n_workers=n_workers
+            )
+            results = tuner.tune(clinical_data[self.features], clinical_data[self.complication_types])
+        
+        self.model_params = {complication: result['params'] for complication, result in results.items()}
+        self.audit_trail.log(
+            'model_tuned', component='risk_engine', model_params=self.model_params,
+            validation_auc={complication: result['validation_auc'] for complication, result in results.items()}
+        )
+        return results
+    
+    def _resolve_model_backends(self, model_backend):
+        """Expand a backend name or {complication: backend} mapping to every complication"""
+        if isinstance(model_backend, str):
+            backends = {complication: model_backend for complication in self.complication_types}
+        else:
+            backends = {
+                complication: model_backend.get(complication, 'random_forest')
+                for complication in self.complication_types
+            }
+        for backend in set(backends.values()):
+            if backend not in self.model_backends_available:
+                raise ValueError(
+                    f"Unknown model backend '{backend}', expected one of {self.model_backends_available}"
+                )
+        return backends
+    
+    def _model_backends_from(self, models):
+        """Model family of each loaded complication model"""
+        if isinstance(models, ModelArtifact):
+            # Array artifacts only hold forests; avoid mapping them just to check
+            return {complication: 'random_forest' for complication in models.keys()}
+        from gradient_boosting import BinnedGradientBoostingClassifier
+        return {
+            complication: 'hist_gradient_boosting'
+            if isinstance(model, BinnedGradientBoostingClassifier) else 'random_forest'
+            for complication, model in models.items()
+        }
+    
+    def _features_from(self, models):
+        """Model columns a loaded model was trained on (current features if unrecorded)"""
+        if isinstance(models, ModelArtifact):
+            features = models.manifest.get('features')
+        else:
+            features = next((getattr(model, 'feature_names_in_', None) for model in models.values()), None)
+        return list(features) if features is not None else self.features
+    
+    def _model_params_from(self, models):
+        """Recover per-complication forest settings from loaded forests"""
+        if isinstance(models, ModelArtifact):
+            return dict(models.model_params)
+        from sklearn.ensemble import RandomForestClassifier
+        from model_tuning import TUNABLE_PARAMS
+        return {
+            complication: {key: model.get_params()[key] for key in TUNABLE_PARAMS}
+            for complication, model in models.items()
+            if isinstance(model, RandomForestClassifier)
+        }
+    
+    def _record_performance(self, complication, accuracy, X_train, X_test, timings, y_test,
+                            holdout_scores):
+        """Store per-complication performance metrics for NIW evidence"""
+        y_test = np.asarray(y_test)
+        self.holdout_predictions[complication] = (y_test, holdout_scores)
+        clinical_metrics = self.validator.calculate_clinical_metrics(y_test, holdout_scores)
+        self.performance_metrics[complication] = {
+            'accuracy': round(accuracy, 3),
+            'sensitivity': clinical_metrics['sensitivity'],
+            'specificity': clinical_metrics['specificity'],
+            'auc_roc': clinical_metrics['auc_roc'],
+            'features_used': len(self.features),
+            'training_samples': len(X_train),
+            'test_samples': len(X_test),
+            'training_wall_seconds': round(timings['wall_seconds'], 3),
+            'training_cpu_seconds': round(timings['cpu_seconds'], 3),
+            'training_cores': timings['cores']
+        }
+    
+    def validate_model(self, n_resamples=1000, confidence=0.95, n_workers=1):
+        """
+        Bootstrap confidence intervals on the holdout set of the last training run
+        NIW Evidence: FDA Clinical Performance Validation
+        
+        Adds a ``clinical_validation`` entry (point metrics, intervals) to each
+        complication's ``performance_metrics`` and returns them. Resampling is
+        spread over ``n_workers`` processes.
+        """
+        if not self.holdout_predictions:
+            return "Error: No holdout predictions - train the model first"
+        
+        validator = ModelValidator(
+            threshold=self.validator.threshold, n_workers=n_workers, seed=self.validator.seed
+        )
+        validation = {}
+        for complication, (y_test, holdout_scores) in self.holdout_predictions.items():
+            validation[complication] = validator.validate(y_test, holdout_scores, n_resamples, confidence)
+            self.performance_metrics[complication]['clinical_validation'] = validation[complication]
+        
+        self.audit_trail.log(
+            'model_validated', component='risk_engine', model_fingerprint=self.model_fingerprint,
+            bootstrap_resamples=n_resamples, clinical_validation=validation
+        )
+        return validation
+    
+    def _record_fit_span(self, complication, X_train, timings):
+        """Fits may run in worker processes, so their spans come from the returned timings"""
+        self.tracer.record(
+            'engine.fit', timings['wall_seconds'], rows_in=len(X_train),
+            memory_delta_bytes=timings['memory_delta_bytes'],
+            complication=complication, cores=timings['cores']
+        )
     
     def predict_individual_risk(self, patient_data):
         """
@@ -94,9 +560,18 @@ class DiabetesRiskEngine:
             return "Error: Model not trained"
         
         try:
+            with self.tracer.span('engine.predict_individual_risk', rows_in=1, backend=self.inference_backend):
+                if self.prediction_cache is not None:
+                    cache_key = feature_cache_key(patient_data, self.model_fingerprint)
+                    risk_probs = self.prediction_cache.get(cache_key)
+                    if risk_probs is None:
+                        risk_probs = self._single_risk_probabilities(patient_data)
+                        self.prediction_cache.put(cache_key, risk_probs)
+                else:
+                    risk_probs = self._single_risk_probabilities(patient_data)
+            
             predictions = {}
-            for complication, model in self.model.items():
-                risk_prob = model.predict_proba([patient_data])[0][1]
+            for complication, risk_prob in zip(self.model, risk_probs):
                 risk_level = self._classify_risk_level(risk_prob)
                 
                 predictions[complication] = {
@@ -110,6 +585,139 @@ class DiabetesRiskEngine:
         except Exception as e:
             return f"Prediction error: {str(e)}"
     
+    def predict_batch(self, patients):
+        """
+        Predict complication risks for a panel of patients in one pass
+        NIW Evidence: Population-Scale Clinical Decision Support
+        
+        Returns a columnar DataFrame indexed like ``patients`` with
+        ``<complication>_probability``, ``<complication>_risk_level`` and
+        ``<complication>_clinical_alert`` columns for every complication.
+        A ClinicalFeatureStore is scored whole, indexed by hashed_id.
+        """
+        if self.model is None:
+            return "Error: Model not trained"
+        
+        try:
+            patients = self._clinical_frame(patients, self.features, index_by_id=True)
+            with self.tracer.span('engine.predict_batch', rows_in=len(patients),
+                                  backend=self.inference_backend) as span:
+                X = patients[self.features]
+                if self.prediction_cache is not None:
+                    all_risk_probs = self._cached_batch_risk_probabilities(X)
+                else:
+                    all_risk_probs = self._batch_risk_probabilities(X)
+                span.set_rows_out(len(all_risk_probs))
+            
+            results = {}
+            for complication, risk_probs in zip(self.model, all_risk_probs.T):
+                risk_levels = self._classify_risk_levels(risk_probs)
+                
+                results[f"{complication}_probability"] = np.round(risk_probs, 3)
+                results[f"{complication}_risk_level"] = risk_levels
+                results[f"{complication}_clinical_alert"] = np.isin(risk_levels, ALERT_RISK_LEVELS)
+            
+            return pd.DataFrame(results, index=patients.index)
+            
+        except Exception as e:
+            return f"Prediction error: {str(e)}"
+    
+    @staticmethod
+    def _clinical_frame(data, columns, index_by_id=False):
+        """DataFrames pass through; a ClinicalFeatureStore is read column-wise"""
+        if isinstance(data, pd.DataFrame):
+            return data
+        return data.read(columns, index_by_id=index_by_id)
+    
+    def _single_risk_probabilities(self, patient_data):
+        """Positive-class probability per complication for one feature list"""
+        if self.inference_backend == 'compiled':
+            return self._get_compiled_model().predict_proba(patient_data)[0]
+        return np.array([probs[0] for probs in self._sklearn_risk_probabilities([patient_data])])
+    
+    def _batch_risk_probabilities(self, X):
+        """(n_patients, n_complications) positive-class probabilities"""
+        if self.inference_backend == 'compiled':
+            # Straight to the trees' float32, no float64 intermediate
+            return self._get_compiled_model().predict_proba(X.to_numpy(dtype=np.float32))
+        return np.column_stack(self._sklearn_risk_probabilities(X))
+    
+    def _cached_batch_risk_probabilities(self, X):
+        """Batch scoring that only runs the model for cache misses"""
+        rows = X.to_numpy(dtype=np.float64)
+        cache_keys = [feature_cache_key(row, self.model_fingerprint) for row in rows]
+        all_risk_probs = np.empty((len(rows), len(self.model)), dtype=np.float64)
+        
+        misses = []
+        for i, cache_key in enumerate(cache_keys):
+            risk_probs = self.prediction_cache.get(cache_key)
+            if risk_probs is None:
+                misses.append(i)
+            else:
+                all_risk_probs[i] = risk_probs
+        
+        if misses:
+            miss_probs = self._batch_risk_probabilities(X.iloc[misses])
+            all_risk_probs[misses] = miss_probs
+            for i, risk_probs in zip(misses, miss_probs):
+                self.prediction_cache.put(cache_keys[i], risk_probs)
+        
+        return all_risk_probs
+    
+    def _sklearn_risk_probabilities(self, X):
+        """Positive-class probabilities per complication, one pass per shared forest"""
+        shared_outputs = {}
+        all_risk_probs = []
+        for complication, model in self.model.items():
+            if isinstance(model, ComplicationOutputModel):
+                forest_key = id(model.forest)
+                if forest_key not in shared_outputs:
+                    with self.tracer.span('engine.predict', rows_in=len(X), complication='multi_output'):
+                        shared_outputs[forest_key] = model.forest.predict_proba(X)
+                all_risk_probs.append(shared_outputs[forest_key][model.output_index][:, 1])
+            else:
+                with self.tracer.span('engine.predict', rows_in=len(X), complication=complication):
+                    all_risk_probs.append(model.predict_proba(X)[:, 1])
+        return all_risk_probs
+    
+    def set_inference_backend(self, backend):
+        """Select 'sklearn' or the array-backed 'compiled' scoring backend"""
+        if backend not in self.inference_backends:
+            raise ValueError(
+                f"Unknown inference backend '{backend}', expected one of {self.inference_backends}"
+            )
+        self.inference_backend = backend
+    
+    def _on_model_changed(self):
+        """Refresh derived state whenever self.model is replaced"""
+        self._compiled_model = None
+        self.model_fingerprint = self._compute_model_fingerprint()
+        if self.prediction_cache is not None:
+            self.prediction_cache.clear()
+    
+    def _compute_model_fingerprint(self):
+        """Stable identity of the current model, used to key cached predictions"""
+        if isinstance(self.model, ModelArtifact):
+            return self.model.fingerprint
+        digest = hashlib.sha256()
+        _update_model_digest(digest, self.model)
+        return digest.hexdigest()
+    
+    def _get_compiled_model(self):
+        """Flatten the trained forests into node arrays on first use"""
+        if self._compiled_model is None:
+            if set(self.model_backends.values()) - {'random_forest'}:
+                raise ValueError("The compiled backend supports random_forest complications only")
+            if isinstance(self.model, ModelArtifact):
+                self._compiled_model = self.model.ensemble
+            else:
+                self._compiled_model = CompiledForestEnsemble.from_models(self.model)
+        return self._compiled_model
+    
+    def _classify_risk_levels(self, probabilities):
+        """Vectorized clinical risk stratification, matches _classify_risk_level"""
+        return classify_risk_levels(probabilities)
+    
     def _classify_risk_level(self, probability):
         """Clinical risk stratification based on probability"""
         if probability >= 0.7:
@@ -121,19 +729,85 @@ class DiabetesRiskEngine:
         else:
             return "low"
     
-    def save_model(self, filepath):
-        """Save trained model for deployment - NIW Evidence"""
+    def save_model(self, filepath, artifact_format='joblib', max_trees=None, leaf_tolerance=0.0,
+                   validation_data=None, max_auc_loss=0.005):
+        """
+        Save trained model for deployment - NIW Evidence
+        
+        ``artifact_format='arrays'`` writes a directory of memory-mappable node
+        arrays (see model_artifacts) instead of a joblib pickle, and
+        ``'compact'`` the same with the narrowest node dtypes. Array formats
+        can be pruned with ``max_trees``/``leaf_tolerance``, which requires
+        labelled ``validation_data``: pruning that loses more than
+        ``max_auc_loss`` AUC-ROC on any complication is refused.
+        """
+        if artifact_format not in ('joblib', 'arrays', 'compact'):
+            raise ValueError(f"Unknown artifact format '{artifact_format}'")
+        pruning = max_trees is not None or leaf_tolerance > 0
+        if pruning and artifact_format == 'joblib':
+            raise ValueError("Pruning applies to 'arrays' and 'compact' artifacts only")
+        if pruning and validation_data is None:
+            raise ValueError("Pruning requires validation_data to bound the AUC-ROC loss")
         if self.model:
-            joblib.dump(self.model, filepath)
-            print(f"✅ Model saved to {filepath} - NIW Technical Asset")
+            if artifact_format in ('arrays', 'compact'):
+                if set(self.model_backends.values()) - {'random_forest'}:
+                    raise ValueError("Array artifacts support random_forest complications only")
+                validation = None
+                if pruning:
+                    validation = (
+                        validation_data[self.features].to_numpy(dtype=np.float32),
+                        {complication: validation_data[complication] for complication in self.model}
+                    )
+                export_model_artifact(
+                    self.model, filepath, features=self.features, model_params=self.model_params,
+                    compact=artifact_format == 'compact', max_trees=max_trees,
+                    leaf_tolerance=leaf_tolerance, validation=validation, max_auc_loss=max_auc_loss
+                )
+            else:
+                import joblib
+                joblib.dump(self.model, filepath)
+            self.audit_trail.log(
+                'model_saved', component='risk_engine', path=str(filepath),
+                artifact_format=artifact_format, model_fingerprint=self.model_fingerprint,
+                max_trees=max_trees, leaf_tolerance=leaf_tolerance
+            )
     
-    def load_model(self, filepath):
-        """Load pre-trained model - NIW Evidence"""
-        self.model = joblib.load(filepath)
-        print(f"✅ Model loaded from {filepath}")
+    def load_model(self, filepath, verify_checksums=False):
+        """
+        Load pre-trained model - NIW Evidence
+        
+        Array artifact directories are memory-mapped lazily on first
+        prediction and scored with the compiled backend. With
+        ``verify_checksums=True`` every array file is read and hashed before
+        the load returns (ValueError on a corrupted or tampered artifact);
+        that adds a full read of the artifact to cold start, roughly 1 ms per
+        MB at sha256 speed plus disk time, so it is opt-in as in
+        ``risk_inference.load_risk_scorer``.
+        """
+        if is_model_artifact(filepath):
+            artifact = ModelArtifact(filepath)
+            if verify_checksums:
+                artifact.verify()
+            self.model = artifact
+            self.set_inference_backend('compiled')
+        else:
+            import joblib
+            self.model = joblib.load(filepath)
+        # Holdout predictions belong to the previously trained model
+        self.holdout_predictions = {}
+        self.model_params = self._model_params_from(self.model)
+        self.model_backends = self._model_backends_from(self.model)
+        self.features = self._features_from(self.model)
+        self._on_model_changed()
+        self.audit_trail.log(
+            'model_loaded', component='risk_engine', path=str(filepath),
+            model_fingerprint=self.model_fingerprint
+        )
 
 # NIW Evidence - Comprehensive testing
 if __name__ == "__main__":
+    # Show the audit trail on the console
+    logging.basicConfig(level=logging.INFO)
     print("=== NIW TECHNICAL EVIDENCE: AI RISK ENGINE ===")
     
     # Initialize engine
@@ -164,6 +838,8 @@ if __name__ == "__main__":
     
     # Train model
     models = engine.train_model(synthetic_data)
+    print("✅ AI Model trained successfully - NIW Technical Proof")
+    print(f"📊 Model Performance: {json.dumps(engine.performance_metrics, indent=2)}")
     
     # Test prediction
     print("\n=== INDIVIDUAL RISK PREDICTION ===")
@@ -171,8 +847,15 @@ if __name__ == "__main__":
     prediction = engine.predict_individual_risk(test_patient)
     print(f"✅ Patient Risk Assessment: {json.dumps(prediction, indent=2)}")
     
+    # Test batch prediction
+    print("\n=== PANEL RISK PREDICTION ===")
+    panel_scores = engine.predict_batch(synthetic_data)
+    print(f"✅ Scored {len(panel_scores)} patients across {len(engine.complication_types)} complications")
+    print(panel_scores.head())
+    
     print("\n🎯 NIW EVIDENCE: AI Engine successfully demonstrates:")
     print("   - Clinical-grade risk prediction")
     print("   - Multi-complication analysis") 
     print("   - Performance metrics tracking")
     print("   - Real-time decision support capability")
+    print("   - Population-scale batch scoring")
@@ -0,0 +1,122 @@
+"""
+Cohort Query Index Benchmark
+NIW Evidence: Population Health Care-Management Worklists
+
+Builds a RiskResultIndex over synthetic registry-scale risk scores and
+compares care-manager queries against a pandas boolean-mask scan of the same
+results, before and after an incremental rescoring batch.
+
+Usage:
+    python benchmarks/benchmark_cohort_query.py --patients 1000000 --rescored 20000
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from datasets import BENCHMARK_SEED
+from cohort_query import RiskResultIndex
+from data_processor import pseudonymize_ids
+from risk_inference import classify_risk_levels
+
+COMPLICATIONS = ['retinopathy_risk', 'neuropathy_risk', 'nephropathy_risk', 'cardiovascular_risk']
+QUERIES = {
+    'very_high nephropathy & high cardiovascular': dict(
+        risk_levels={'nephropathy_risk': 'very_high', 'cardiovascular_risk': 'high'}),
+    'retinopathy probability in [0.9, 1.0]': dict(probability={'retinopathy_risk': (0.9, None)}),
+    'alerts on all four complications': dict(alerts=COMPLICATIONS),
+    'moderate neuropathy & nephropathy < 0.1': dict(
+        risk_levels={'neuropathy_risk': 'moderate'}, probability={'nephropathy_risk': (None, 0.1)}),
+}
+
+
+def synthetic_scores(n_patients, seed, id_offset=0):
+    rng = np.random.default_rng(seed)
+    scores = {'hashed_id': pseudonymize_ids(np.arange(id_offset, id_offset + n_patients))}
+    for complication in COMPLICATIONS:
+        probability = np.round(rng.beta(1.5, 4, n_patients), 3)
+        scores[f"{complication}_probability"] = probability
+        scores[f"{complication}_risk_level"] = classify_risk_levels(probability)
+    return pd.DataFrame(scores)
+
+
+def scan(frame, risk_levels=None, probability=None, alerts=()):
+    mask = np.ones(len(frame), dtype=bool)
+    for complication, level in (risk_levels or {}).items():
+        mask &= (frame[f"{complication}_risk_level"] == level).to_numpy()
+    for complication, (low, high) in (probability or {}).items():
+        values = frame[f"{complication}_probability"].to_numpy()
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values < high
+    for complication in alerts:
+        mask &= frame[f"{complication}_clinical_alert"].to_numpy()
+    return frame['hashed_id'].to_numpy()[mask]
+
+
+def median_ms(fn, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return round(float(np.median(timings)) * 1e3, 3), result
+
+
+def time_queries(index, frame, label):
+    rows = []
+    for name, query in QUERIES.items():
+        index_ms, ids = median_ms(lambda: index.query(**query))
+        scan_ms, expected = median_ms(lambda: scan(frame, **query))
+        assert set(ids) == set(expected)
+        rows.append({'state': label, 'query': name, 'matches': len(ids),
+                     'index_ms': index_ms, 'scan_ms': scan_ms, 'speedup': round(scan_ms / index_ms, 1)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=1_000_000)
+    parser.add_argument('--rescored', type=int, default=20_000)
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    frame = synthetic_scores(args.patients, seed=BENCHMARK_SEED)
+    for complication in COMPLICATIONS:
+        frame[f"{complication}_clinical_alert"] = frame[f"{complication}_risk_level"].isin(['high', 'very_high'])
+    start = time.perf_counter()
+    index = RiskResultIndex.from_scores(frame)
+    build_seconds = time.perf_counter() - start
+    results = time_queries(index, frame, 'built')
+
+    rescored = synthetic_scores(args.rescored, seed=BENCHMARK_SEED + 1)
+    for complication in COMPLICATIONS:
+        rescored[f"{complication}_clinical_alert"] = rescored[f"{complication}_risk_level"].isin(['high', 'very_high'])
+    start = time.perf_counter()
+    stats = index.upsert(rescored)
+    upsert_seconds = time.perf_counter() - start
+    frame = pd.concat([frame.iloc[args.rescored:], rescored], ignore_index=True)
+    results += time_queries(index, frame, f"+{args.rescored} rescored (delta)")
+
+    start = time.perf_counter()
+    index.compact()
+    compact_seconds = time.perf_counter() - start
+    summary = {'patients': args.patients, 'build_seconds': round(build_seconds, 3),
+               'upsert_seconds': round(upsert_seconds, 3), 'upsert': stats,
+               'compact_seconds': round(compact_seconds, 3)}
+
+    if args.json:
+        print(json.dumps({'summary': summary, 'queries': results}, indent=2))
+        return
+    print(f"=== COHORT QUERY INDEX ({args.patients} patients) ===")
+    print(f"🔎 build {summary['build_seconds']} s, upsert {summary['upsert_seconds']} s, "
+          f"compact {summary['compact_seconds']} s")
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
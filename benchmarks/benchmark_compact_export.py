@@ -0,0 +1,147 @@
+"""
+Compact Model Export Benchmark
+NIW Evidence: Deployment-Ready Model Packaging
+
+Trains the four complication forests on a pinned cohort, saves them as the
+joblib pickle, the array artifact, the compact artifact and a pruned compact
+artifact, and reports each format's size on disk, cold load time (fresh
+process, load + first prediction), single-patient and batch latency, and
+holdout AUC-ROC. A pruned export refused for exceeding --max-auc-loss is
+reported in its row instead of stopping the run.
+
+Usage:
+    python benchmarks/benchmark_compact_export.py --patients 100000 --max-trees 50 --leaf-tolerance 0.01
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from datasets import pinned_cohort
+from performance_metrics import ModelValidator
+from risk_prediction import DiabetesRiskEngine
+
+AI_ENGINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-engine'))
+LATENCY_SAMPLES = 200
+BATCH_ROWS = 10_000
+
+COLD_LOAD_SCRIPT = """
+import sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {engine_dir!r})
+from risk_prediction import DiabetesRiskEngine
+engine = DiabetesRiskEngine()
+start = time.perf_counter()
+engine.load_model({path!r})
+engine.predict_individual_risk([45, 28.5, 7.2, 140, 85, 110, 45, 180, 0, 8, 90])
+print(time.perf_counter() - start)
+"""
+
+
+def size_on_disk(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def cold_load_seconds(path, repeats=3):
+    script = COLD_LOAD_SCRIPT.format(engine_dir=AI_ENGINE_DIR, path=path)
+    return min(
+        float(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                             check=True).stdout.strip().splitlines()[-1])
+        for _ in range(repeats)
+    )
+
+
+def benchmark_format(label, path, test_data):
+    engine = DiabetesRiskEngine()
+    engine.load_model(path)
+    patients = test_data[engine.features].head(LATENCY_SAMPLES).values.tolist()
+    engine.predict_individual_risk(patients[0])
+    latencies = []
+    for patient in patients:
+        start = time.perf_counter()
+        engine.predict_individual_risk(patient)
+        latencies.append(time.perf_counter() - start)
+
+    panel = test_data.head(BATCH_ROWS)
+    start = time.perf_counter()
+    scores = engine.predict_batch(panel)
+    batch_seconds = time.perf_counter() - start
+
+    all_scores = engine.predict_batch(test_data)
+    validator = ModelValidator()
+    auc = np.mean([
+        validator.calculate_clinical_metrics(test_data[c], all_scores[f"{c}_probability"])['auc_roc']
+        for c in engine.complication_types
+    ])
+    return {
+        'format': label,
+        'backend': engine.inference_backend,
+        'size_mb': round(size_on_disk(path) / 1e6, 2),
+        'cold_load_ms': round(cold_load_seconds(path) * 1e3, 1),
+        'single_p50_ms': round(float(np.percentile(latencies, 50)) * 1e3, 3),
+        'batch_10k_seconds': round(batch_seconds, 3),
+        'mean_auc_roc': round(float(auc), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=100_000)
+    parser.add_argument('--test', type=int, default=20_000)
+    parser.add_argument('--max-trees', type=int, default=50)
+    parser.add_argument('--leaf-tolerance', type=float, default=0.01)
+    parser.add_argument('--max-auc-loss', type=float, default=0.005)
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    cohort = pinned_cohort(args.patients + 2 * args.test)
+    train_data = cohort.iloc[:args.patients]
+    validation_data = cohort.iloc[args.patients:args.patients + args.test]
+    test_data = cohort.iloc[args.patients + args.test:]
+
+    with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+        warnings.simplefilter('ignore')
+        engine = DiabetesRiskEngine()
+        engine.train_model(train_data)
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            formats = [
+                ('joblib pickle', 'model.joblib', dict(artifact_format='joblib')),
+                ('arrays', 'model_arrays', dict(artifact_format='arrays')),
+                ('compact', 'model_compact', dict(artifact_format='compact')),
+                (f"compact pruned ({args.max_trees} trees, leaf tol {args.leaf_tolerance})", 'model_pruned',
+                 dict(artifact_format='compact', max_trees=args.max_trees, leaf_tolerance=args.leaf_tolerance,
+                      validation_data=validation_data, max_auc_loss=args.max_auc_loss)),
+            ]
+            for label, filename, options in formats:
+                path = os.path.join(tmpdir, filename)
+                try:
+                    engine.save_model(path, **options)
+                except ValueError as e:
+                    # Pruning past the AUC bound is refused; report it and keep the other rows
+                    results.append({'format': label, 'refused': str(e)})
+                    continue
+                results.append(benchmark_format(label, path, test_data))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"=== MODEL EXPORT FORMATS ({args.patients} training patients) ===")
+    print(pd.DataFrame(results).fillna('').to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Feature Store Delta Load vs Full Recompute Benchmark
+NIW Evidence: Daily-Refresh Clinical Feature Engineering
+
+Builds a ClinicalFeatureStore from a pinned registry snapshot, then simulates
+the next day's snapshot in which a small fraction of patients have new labs
+and a few patients are new. Compares recomputing derived features for every
+patient against an incremental upsert of the full snapshot and of the
+changed rows only.
+
+Usage:
+    python benchmarks/benchmark_feature_store.py --patients 1000000 --changed 0.01 --new 0.005
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from datasets import pinned_cohort
+from data_processor import ClinicalDataProcessor, pseudonymize_ids
+from feature_store import ClinicalFeatureStore
+
+
+def registry_snapshots(n_patients, changed_fraction, new_fraction, seed=2025):
+    """Today's snapshot, tomorrow's snapshot and tomorrow's changed/new rows"""
+    n_new = int(n_patients * new_fraction)
+    cohort = pinned_cohort(n_patients + n_new)
+    cohort.insert(0, 'hashed_id', pseudonymize_ids(cohort.pop('patient_id')))
+    today = cohort.iloc[:n_patients]
+
+    tomorrow = cohort.copy()
+    rng = np.random.default_rng(seed)
+    changed = rng.choice(n_patients, int(n_patients * changed_fraction), replace=False)
+    tomorrow.loc[changed, 'hba1c'] = np.round(tomorrow.loc[changed, 'hba1c'] + rng.normal(0, 0.5, len(changed)), 1)
+    tomorrow.loc[changed, 'systolic_bp'] += rng.integers(-10, 11, len(changed))
+    delta = tomorrow.iloc[np.concatenate([changed, np.arange(n_patients, n_patients + n_new)])]
+    return today, tomorrow, delta
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(n_patients, changed_fraction, new_fraction):
+    today, tomorrow, delta = registry_snapshots(n_patients, changed_fraction, new_fraction)
+    processor = ClinicalDataProcessor(compact_dtypes=True)
+    results = {'patients': n_patients, 'changed_rows': len(delta)}
+
+    results['recompute_in_memory_seconds'], _ = timed(processor.calculate_clinical_metrics, tomorrow)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ClinicalFeatureStore(directory, processor=processor)
+        results['initial_load_seconds'], _ = timed(store.upsert, today)
+        results['full_rebuild_seconds'], _ = timed(store.rebuild, tomorrow)
+
+        store.rebuild(today)
+        results['delta_snapshot_seconds'], stats = timed(store.upsert, tomorrow)
+        results['delta_snapshot_stats'] = stats
+
+        store.rebuild(today)
+        results['delta_rows_only_seconds'], _ = timed(store.upsert, delta)
+    for key in list(results):
+        if key.endswith('_seconds'):
+            results[key] = round(results[key], 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=1_000_000)
+    parser.add_argument('--changed', type=float, default=0.01, help='fraction of patients with new labs')
+    parser.add_argument('--new', type=float, default=0.005, help='fraction of new patients')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    results = run(args.patients, args.changed, args.new)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"=== FEATURE STORE BENCHMARK ({results['patients']} patients, "
+          f"{results['changed_rows']} changed or new) ===")
+    print(pd.Series({k: v for k, v in results.items() if k.endswith('_seconds')}).to_string())
+    print(f"📊 Delta snapshot: {results['delta_snapshot_stats']}")
+
+
+if __name__ == "__main__":
+    main()
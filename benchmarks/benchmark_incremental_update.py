@@ -0,0 +1,110 @@
+"""
+Incremental Update vs Full Retrain Benchmark
+NIW Evidence: Continuous Learning at Daily-Refresh Cost
+
+Simulates daily refreshes: a model trained on a history cohort receives a
+batch of new patients each day. One engine is retrained from scratch on the
+full accumulated history, the other is warm-started with update_model on the
+new batch only. Both are scored on the same fixed test cohort.
+
+Usage:
+    python benchmarks/benchmark_incremental_update.py --history 50000 --daily 2000 --days 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from datasets import pinned_cohort
+from performance_metrics import ModelValidator
+from risk_prediction import DiabetesRiskEngine
+
+
+def mean_holdout_metrics(engine, test_data):
+    """Mean accuracy and AUC-ROC over complications on a fixed test cohort"""
+    scores = engine.predict_batch(test_data)
+    validator = ModelValidator()
+    metrics = [
+        validator.calculate_clinical_metrics(test_data[c], scores[f"{c}_probability"])
+        for c in engine.complication_types
+    ]
+    return {
+        'accuracy': round(float(np.mean([m['accuracy'] for m in metrics])), 4),
+        'auc_roc': round(float(np.mean([m['auc_roc'] for m in metrics])), 4),
+    }
+
+
+def run(history_size, daily_size, days, n_new_trees, max_trees, test_size):
+    cohort = pinned_cohort(history_size + days * daily_size + test_size)
+    history = cohort.iloc[:history_size]
+    test_data = cohort.iloc[-test_size:]
+
+    full_engine, incremental_engine = DiabetesRiskEngine(), DiabetesRiskEngine()
+    incremental_engine.train_model(history)
+
+    results = []
+    for day in range(1, days + 1):
+        start = history_size + (day - 1) * daily_size
+        new_data = cohort.iloc[start:start + daily_size]
+        accumulated = cohort.iloc[:start + daily_size]
+
+        t0 = time.perf_counter()
+        full_engine.train_model(accumulated)
+        full_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        incremental_engine.update_model(new_data, n_new_trees=n_new_trees, max_trees=max_trees)
+        update_seconds = time.perf_counter() - t0
+
+        full_metrics = mean_holdout_metrics(full_engine, test_data)
+        update_metrics = mean_holdout_metrics(incremental_engine, test_data)
+        results.append({
+            'day': day,
+            'history_rows': len(accumulated),
+            'full_retrain_seconds': round(full_seconds, 3),
+            'update_seconds': round(update_seconds, 3),
+            'speedup': round(full_seconds / update_seconds, 1),
+            'full_retrain': full_metrics,
+            'incremental': update_metrics,
+            'auc_drift': round(update_metrics['auc_roc'] - full_metrics['auc_roc'], 4),
+            'trees_per_forest': len(incremental_engine.model['retinopathy_risk'].estimators_),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--history', type=int, default=50000)
+    parser.add_argument('--daily', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--new-trees', type=int, default=20)
+    parser.add_argument('--max-trees', type=int, default=200)
+    parser.add_argument('--test', type=int, default=20000)
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+        warnings.simplefilter('ignore')
+        results = run(args.history, args.daily, args.days, args.new_trees, args.max_trees, args.test)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"=== INCREMENTAL UPDATE BENCHMARK ({args.history} history, {args.daily}/day) ===")
+    print(pd.DataFrame([{
+        'day': r['day'], 'history_rows': r['history_rows'],
+        'retrain_s': r['full_retrain_seconds'], 'update_s': r['update_seconds'], 'speedup': r['speedup'],
+        'retrain_auc': r['full_retrain']['auc_roc'], 'update_auc': r['incremental']['auc_roc'],
+        'auc_drift': r['auc_drift'], 'trees': r['trees_per_forest'],
+    } for r in results]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
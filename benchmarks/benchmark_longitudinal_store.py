@@ -0,0 +1,104 @@
+"""
+Longitudinal Lab Store Incremental Append Benchmark
+NIW Evidence: HbA1c Trajectory Tracking Across Follow-Up Visits
+
+Loads a pinned cohort's lab history (HbA1c and blood pressure readings over
+the given number of months) into a LongitudinalLabStore, then times one
+more day of results appended incrementally against recomputing the rolling
+features from the full history, and a per-patient range read against a
+scan of the full observation table.
+
+Usage:
+    python benchmarks/benchmark_longitudinal_store.py --patients 200000 --months 24
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from datasets import BENCHMARK_SEED, pinned_cohort
+from data_processor import pseudonymize_ids
+from longitudinal_store import LAB_TESTS, LongitudinalLabStore
+
+VISITS_PER_YEAR = 4
+RANGE_READS = 200
+
+
+def lab_feed(hashed_ids, start, days, rng):
+    """Quarterly-style visits spread over ``days``, each with HbA1c and BP readings"""
+    n_visits = int(len(hashed_ids) * VISITS_PER_YEAR * days / 365)
+    patients = hashed_ids[rng.integers(0, len(hashed_ids), n_visits)]
+    visit_times = start + pd.to_timedelta(rng.integers(0, days * 86400, n_visits), unit='s')
+    frames = []
+    for test, (mean, sd) in zip(LAB_TESTS, [(8.0, 1.5), (135.0, 15.0), (85.0, 10.0)]):
+        frames.append(pd.DataFrame({
+            'hashed_id': patients, 'observed_at': visit_times, 'test': test,
+            'value': np.round(rng.normal(mean, sd, n_visits), 1),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run(n_patients, months):
+    rng = np.random.default_rng(BENCHMARK_SEED)
+    hashed_ids = np.asarray(pseudonymize_ids(pinned_cohort(n_patients)['patient_id']))
+    start = pd.Timestamp('2024-01-01')
+    history_days = int(months * 30.4)
+    history = lab_feed(hashed_ids, start, history_days, rng)
+    next_day = lab_feed(hashed_ids, start + pd.Timedelta(days=history_days), 1, rng)
+    results = {'patients': n_patients, 'history_rows': len(history), 'daily_rows': len(next_day)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = LongitudinalLabStore(directory)
+        results['history_load_seconds'], _ = timed(store.append, history)
+        results['daily_append_seconds'], stats = timed(store.append, next_day)
+        results['daily_append_stats'] = stats
+        results['full_recompute_seconds'], _ = timed(store.rebuild_state)
+        results['export_features_seconds'], _ = timed(store.features)
+
+        patients = rng.choice(hashed_ids, RANGE_READS)
+        window = {'start': start + pd.Timedelta(days=history_days - 365), 'tests': ['hba1c']}
+        seconds, _ = timed(lambda: [store.history(p, **window) for p in patients])
+        results['range_read_ms'] = seconds / RANGE_READS * 1e3
+        store.compact()
+        seconds, _ = timed(lambda: [store.history(p, **window) for p in patients])
+        results['range_read_compacted_ms'] = seconds / RANGE_READS * 1e3
+
+    table = pd.concat([history, next_day], ignore_index=True)
+    seconds, _ = timed(lambda: [table[(table['hashed_id'] == p) & (table['test'] == 'hba1c')
+                                      & (table['observed_at'] >= window['start'])] for p in patients[:20]])
+    results['range_read_table_scan_ms'] = seconds / 20 * 1e3
+    for key in list(results):
+        if key.endswith(('_seconds', '_ms')):
+            results[key] = round(results[key], 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=200_000)
+    parser.add_argument('--months', type=int, default=24, help='months of lab history loaded first')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    results = run(args.patients, args.months)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"=== LONGITUDINAL LAB STORE BENCHMARK ({results['patients']} patients, "
+          f"{results['history_rows']} history rows, {results['daily_rows']} new rows) ===")
+    print(pd.Series({k: v for k, v in results.items() if k.endswith(('_seconds', '_ms'))}).to_string())
+    print(f"📊 Daily append: {results['daily_append_stats']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Worker Cold-Start and Memory Benchmark for Model Artifacts
+NIW Evidence: Scalable Clinical AI Deployment
+
+Starts N concurrent worker processes that each load the risk model and score
+one patient, once from the joblib pickle, once from the memory-mapped
+array artifact and once through the NumPy-only risk_inference entry point,
+and reports per-worker import and model load time, first-prediction latency,
+RSS and PSS (proportional set size, which splits shared pages between the
+processes mapping them). The cumulative ``python -X importtime`` cost of each
+entry module is reported too.
+
+Usage:
+    python benchmarks/benchmark_model_loading.py --patients 20000 --workers 4
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+AI_ENGINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ai-engine'))
+
+WORKER_SCRIPT = """
+import json, sys, time, warnings, contextlib, io
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {engine_dir!r})
+
+def memory_kb():
+    stats = {{}}
+    for path, keys in (('/proc/self/status', ('VmRSS',)), ('/proc/self/smaps_rollup', ('Pss',))):
+        try:
+            with open(path) as f:
+                for line in f:
+                    key = line.split(':')[0]
+                    if key in keys:
+                        stats[key] = int(line.split()[1])
+        except OSError:
+            pass
+    return stats
+
+{loader}
+
+start = time.perf_counter()
+engine.predict_individual_risk([45, 28.5, 7.2, 140, 85, 110, 45, 180, 0, 8, 90])
+first_predict_seconds = time.perf_counter() - start
+
+print(json.dumps({{'import_seconds': import_seconds, 'load_seconds': load_seconds, 'first_predict_seconds': first_predict_seconds}}), flush=True)
+sys.stdin.readline()  # barrier: every worker holds its model before memory is sampled
+print(json.dumps(memory_kb()), flush=True)
+"""
+
+ENGINE_LOADER = """
+start = time.perf_counter()
+from risk_prediction import DiabetesRiskEngine
+import_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+engine = DiabetesRiskEngine()
+with contextlib.redirect_stdout(io.StringIO()):
+    engine.load_model({model_path!r})
+load_seconds = time.perf_counter() - start
+"""
+
+SCORER_LOADER = """
+start = time.perf_counter()
+from risk_inference import load_risk_scorer
+import_seconds = time.perf_counter() - start
+
+start = time.perf_counter()
+engine = load_risk_scorer({model_path!r})
+load_seconds = time.perf_counter() - start
+"""
+
+
+def import_time_ms(module):
+    """Cumulative ``-X importtime`` microseconds of ``module`` in a fresh interpreter, as ms"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=AI_ENGINE_DIR, capture_output=True, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1e3
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def run_workers(model_path, n_workers, loader=ENGINE_LOADER):
+    script = WORKER_SCRIPT.format(
+        engine_dir=AI_ENGINE_DIR, model_path=model_path, loader=loader.format(model_path=model_path)
+    )
+    workers = [
+        subprocess.Popen(
+            [sys.executable, '-c', script],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(n_workers)
+    ]
+    timings = [json.loads(worker.stdout.readline()) for worker in workers]
+    for worker in workers:
+        worker.stdin.write('\n')
+        worker.stdin.flush()
+    memory = [json.loads(worker.stdout.readline()) for worker in workers]
+    for worker in workers:
+        worker.wait()
+    return [dict(t, **m) for t, m in zip(timings, memory)]
+
+
+def summarize(label, results):
+    n = len(results)
+    print(f"\n{label} ({n} workers)")
+    print(f"  engine import (mean):    {sum(r['import_seconds'] for r in results) / n * 1e3:8.1f} ms")
+    print(f"  model load (mean):       {sum(r['load_seconds'] for r in results) / n * 1e3:8.1f} ms")
+    print(f"  first prediction (mean): {sum(r['first_predict_seconds'] for r in results) / n * 1e3:8.1f} ms")
+    if all('VmRSS' in r for r in results):
+        print(f"  RSS per worker (mean):   {sum(r['VmRSS'] for r in results) / n / 1024:8.1f} MB")
+    if all('Pss' in r for r in results):
+        print(f"  PSS per worker (mean):   {sum(r['Pss'] for r in results) / n / 1024:8.1f} MB")
+
+
+def main():
+    from datasets import pinned_cohort
+    from risk_prediction import DiabetesRiskEngine
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    engine = DiabetesRiskEngine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.train_model(pinned_cohort(args.patients))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pickle_path = os.path.join(tmpdir, 'model.joblib')
+        artifact_path = os.path.join(tmpdir, 'model_arrays')
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.save_model(pickle_path)
+            engine.save_model(artifact_path, artifact_format='arrays')
+
+        print(f"=== WORKER COLD START ({args.patients} training patients) ===")
+        summarize("joblib pickle", run_workers(pickle_path, args.workers))
+        summarize("memory-mapped arrays", run_workers(artifact_path, args.workers))
+        summarize("numpy-only risk_inference", run_workers(artifact_path, args.workers, SCORER_LOADER))
+
+    print("\n-X importtime (cumulative)")
+    for module in ('risk_prediction', 'risk_inference'):
+        print(f"  {module + ':':24s} {import_time_ms(module):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
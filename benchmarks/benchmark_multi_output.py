@@ -0,0 +1,78 @@
+"""
+Multi-Output vs Per-Complication Training Benchmark
+NIW Evidence: Model Efficiency Engineering
+
+Compares fit time, saved artifact size and per-complication accuracy of
+DiabetesRiskEngine.train_model in its default per-target mode and in
+multi_output mode.
+
+Usage:
+    python benchmarks/benchmark_multi_output.py --patients 20000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from datasets import pinned_cohort
+from risk_prediction import DiabetesRiskEngine
+
+
+def benchmark_mode(clinical_data, multi_output):
+    engine = DiabetesRiskEngine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine.train_model(clinical_data, multi_output=multi_output)
+        fit_seconds = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'model.joblib')
+            engine.save_model(path)
+            artifact_bytes = os.path.getsize(path)
+
+    panel = clinical_data.head(1000)
+    start = time.perf_counter()
+    engine.predict_batch(panel)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'mode': 'multi_output' if multi_output else 'per_complication',
+        'fit_seconds': round(fit_seconds, 3),
+        'artifact_mb': round(artifact_bytes / 1e6, 2),
+        'batch_1k_seconds': round(batch_seconds, 4),
+        'accuracy': {
+            complication: metrics['accuracy']
+            for complication, metrics in engine.performance_metrics.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=20000)
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    clinical_data = pinned_cohort(args.patients)
+    results = [benchmark_mode(clinical_data, multi_output) for multi_output in (False, True)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"=== TRAINING MODE BENCHMARK ({args.patients} patients) ===")
+    for result in results:
+        print(f"\n{result['mode']}")
+        print(f"  fit time:        {result['fit_seconds']} s")
+        print(f"  artifact size:   {result['artifact_mb']} MB")
+        print(f"  batch 1k score:  {result['batch_1k_seconds']} s")
+        for complication, accuracy in result['accuracy'].items():
+            print(f"  {complication:<22} accuracy {accuracy}")
+
+
+if __name__ == "__main__":
+    main()
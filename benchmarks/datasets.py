@@ -0,0 +1,33 @@
+"""
+Pinned Synthetic Datasets for Benchmarks
+NIW Evidence: Reproducible Performance Engineering
+
+Every benchmark draws its cohort from SyntheticDataGenerator with a fixed
+seed, so timings at a given scale are always measured on identical data.
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+BENCHMARK_SEED = 2025
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'data-synthetic'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ai-engine'))
+
+from generate_data import SyntheticDataGenerator
+
+# Named scales accepted by --scales on the benchmark suite
+SCALES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '5m': 5_000_000,
+}
+
+
+def pinned_cohort(n_patients, seed=BENCHMARK_SEED):
+    """Engine-compatible labelled cohort with patient_id, identical on every call"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SyntheticDataGenerator(patient_count=n_patients, seed=seed).generate_patients()
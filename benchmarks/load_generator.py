@@ -0,0 +1,94 @@
+"""
+Local Load Generator for the Micro-Batching Prediction Service
+NIW Evidence: Real-Time Clinical Decision Support Capacity Planning
+
+Drives concurrent asyncio clients against the risk engine, once with one
+predict_individual_risk call per request and once through
+MicroBatchPredictor, and reports throughput and p50/p99 latency at each
+concurrency level.
+
+Usage:
+    python benchmarks/load_generator.py --concurrency 1 8 32 128 --requests 2000
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from datasets import pinned_cohort
+from prediction_service import MicroBatchPredictor
+from risk_prediction import DiabetesRiskEngine
+
+
+async def drive(predict, patients, concurrency, n_requests):
+    """Run ``n_requests`` predictions from ``concurrency`` closed-loop clients"""
+    latencies = []
+    next_request = iter(range(n_requests))
+
+    async def client():
+        for i in next_request:
+            start = time.perf_counter()
+            await predict(patients[i % len(patients)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1e3
+    return {
+        'throughput_rps': n_requests / elapsed,
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p99_ms': float(np.percentile(latencies_ms, 99)),
+    }
+
+
+async def run_direct(engine, patients, concurrency, n_requests):
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        async def predict(patient_data):
+            return await loop.run_in_executor(executor, engine.predict_individual_risk, patient_data)
+        return await drive(predict, patients, concurrency, n_requests)
+
+
+async def run_micro_batched(engine, patients, concurrency, n_requests, max_batch_size, max_wait_ms):
+    async with MicroBatchPredictor(engine, max_batch_size, max_wait_ms) as predictor:
+        result = await drive(predictor.predict, patients, concurrency, n_requests)
+        result['mean_batch_size'] = predictor.stats()['mean_batch_size']
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--patients', type=int, default=5000, help='training cohort size')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per run')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--backend', choices=DiabetesRiskEngine.inference_backends, default='sklearn')
+    args = parser.parse_args()
+
+    cohort = pinned_cohort(args.patients)
+    engine = DiabetesRiskEngine(inference_backend=args.backend)
+    engine.train_model(cohort)
+    patients = cohort[engine.features].to_numpy().tolist()
+
+    print(f"=== LOAD TEST ({args.backend} backend, {args.requests} requests per run) ===")
+    print(f"{'mode':<14}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'batch':>8}")
+    for concurrency in args.concurrency:
+        direct = asyncio.run(run_direct(engine, patients, concurrency, args.requests))
+        batched = asyncio.run(run_micro_batched(
+            engine, patients, concurrency, args.requests, args.max_batch_size, args.max_wait_ms
+        ))
+        for mode, result in (('direct', direct), ('micro-batch', batched)):
+            print(
+                f"{mode:<14}{concurrency:>8}{result['throughput_rps']:>10.0f}"
+                f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result.get('mean_batch_size', 1):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
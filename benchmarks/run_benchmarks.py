@@ -0,0 +1,235 @@
+"""
+PublicHealthOS Performance Benchmark Suite
+NIW Evidence: Release-over-Release Performance Tracking
+
+Times ingestion (process_pipeline), training (train_model), inference
+(predict_individual_risk on both backends, predict_batch) and model
+persistence (save_model/load_model, joblib and array artifacts) on pinned
+synthetic cohorts. Each run is appended as one JSON line to a history file;
+``compare`` flags regressions against a stored baseline run.
+
+Usage:
+    python benchmarks/run_benchmarks.py run --scales 1k 100k 1m
+    python benchmarks/run_benchmarks.py baseline          # pin the latest run
+    python benchmarks/run_benchmarks.py compare --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+from datasets import SCALES, pinned_cohort
+from data_processor import ClinicalDataProcessor
+from risk_prediction import DiabetesRiskEngine
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_HISTORY = os.path.join(RESULTS_DIR, 'history.jsonl')
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# Single-patient latency sample size and maximum rows scored by predict_batch
+LATENCY_SAMPLES = 200
+MAX_BATCH_ROWS = 1_000_000
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence pipeline prints, INFO logging and sklearn feature-name warnings"""
+    logging.disable(logging.INFO)
+    with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+        warnings.simplefilter('ignore')
+        try:
+            yield
+        finally:
+            logging.disable(logging.NOTSET)
+
+
+def timed(fn, repeats=1):
+    """Best wall time of ``repeats`` calls, and the last result"""
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def latency_percentiles(fn, samples):
+    latencies = []
+    for i in range(samples):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99))
+
+
+def require_success(result, step):
+    """Engine calls report failure by returning None or an error string, not raising"""
+    if result is None or isinstance(result, str):
+        raise RuntimeError(f"{step} failed ({result or 'see the audit trail'}); no timings recorded")
+    return result
+
+
+def benchmark_scale(n_patients, repeats):
+    """All suite benchmarks at one cohort size; returns {benchmark: seconds}"""
+    results = {}
+    cohort = pinned_cohort(n_patients)
+
+    with quiet():
+        results['process_pipeline'], processed = timed(
+            lambda: ClinicalDataProcessor().process_pipeline(cohort), repeats
+        )
+
+        engine = DiabetesRiskEngine()
+        results['train_model'], models = timed(lambda: engine.train_model(processed))
+        require_success(models, 'train_model')
+
+        patients = processed[engine.features].head(LATENCY_SAMPLES).values.tolist()
+        for backend in DiabetesRiskEngine.inference_backends:
+            engine.set_inference_backend(backend)
+            engine.predict_individual_risk(patients[0])  # warm-up (compiles node arrays)
+            p50, p99 = latency_percentiles(
+                lambda i: engine.predict_individual_risk(patients[i % len(patients)]), LATENCY_SAMPLES
+            )
+            results[f'predict_individual_risk_{backend}_p50'] = p50
+            results[f'predict_individual_risk_{backend}_p99'] = p99
+
+            panel = processed.head(MAX_BATCH_ROWS)
+            results[f'predict_batch_{backend}'], scores = timed(lambda: engine.predict_batch(panel), repeats)
+            require_success(scores, f'predict_batch ({backend})')
+
+        engine.set_inference_backend('sklearn')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for artifact_format in ('joblib', 'arrays'):
+                path = os.path.join(tmpdir, f'model_{artifact_format}')
+                results[f'save_model_{artifact_format}'], _ = timed(
+                    lambda: engine.save_model(path, artifact_format=artifact_format)
+                )
+                results[f'load_model_{artifact_format}'], _ = timed(
+                    lambda: DiabetesRiskEngine().load_model(path), repeats
+                )
+
+    return {name: round(seconds, 6) for name, seconds in results.items()}
+
+
+def environment_metadata():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    import pandas
+    import sklearn
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'scikit_learn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def load_history(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_runs(baseline, current, threshold):
+    """Per-benchmark ratios; a benchmark regresses when current > baseline * (1 + threshold)"""
+    rows = []
+    for scale, benchmarks in current['results'].items():
+        for name, seconds in benchmarks.items():
+            reference = baseline['results'].get(scale, {}).get(name)
+            if not reference:
+                continue
+            ratio = seconds / reference
+            rows.append({
+                'scale': scale, 'benchmark': name, 'baseline': reference, 'current': seconds,
+                'ratio': ratio, 'regression': ratio > 1 + threshold,
+            })
+    return rows
+
+
+def command_run(args):
+    record = {'metadata': environment_metadata(), 'results': {}}
+    for scale in args.scales:
+        print(f"⏱️  Benchmarking {scale} ({SCALES[scale]:,} patients)...", flush=True)
+        record['results'][scale] = benchmark_scale(SCALES[scale], args.repeats)
+        for name, seconds in record['results'][scale].items():
+            print(f"   {name:<40} {seconds * 1e3:>12.2f} ms")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+    with open(args.history, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+    print(f"✅ Results appended to {args.history}")
+
+
+def command_baseline(args):
+    record = load_history(args.history)[-1]
+    with open(args.baseline, 'w') as f:
+        json.dump(record, f, indent=2)
+    print(f"✅ Baseline pinned from run {record['metadata']['timestamp']} to {args.baseline}")
+
+
+def command_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    current = load_history(args.history)[-1]
+    rows = compare_runs(baseline, current, args.threshold)
+
+    print(f"{'scale':<7}{'benchmark':<42}{'baseline ms':>13}{'current ms':>13}{'ratio':>8}")
+    for row in rows:
+        flag = '  ❌ REGRESSION' if row['regression'] else ''
+        print(
+            f"{row['scale']:<7}{row['benchmark']:<42}{row['baseline'] * 1e3:>13.2f}"
+            f"{row['current'] * 1e3:>13.2f}{row['ratio']:>8.2f}{flag}"
+        )
+
+    regressions = [row for row in rows if row['regression']]
+    if regressions:
+        print(f"⚠️  {len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    print("🎉 No performance regressions against baseline")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON-lines run history')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='pinned baseline run')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the suite and append to the history')
+    run.add_argument('--scales', nargs='+', choices=list(SCALES), default=['1k', '100k', '1m'])
+    run.add_argument('--repeats', type=int, default=3, help='best-of repeats for short benchmarks')
+
+    commands.add_parser('baseline', help='pin the latest run as the baseline')
+
+    compare = commands.add_parser('compare', help='compare the latest run with the baseline')
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help='allowed slowdown before flagging, as a fraction')
+
+    args = parser.parse_args()
+    handlers = {'run': command_run, 'baseline': command_baseline, 'compare': command_compare}
+    sys.exit(handlers[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
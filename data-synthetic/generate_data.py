@@ -1,33 +1,141 @@
 """
 Synthetic Patient Data Generator
 NIW Evidence - HIPAA-compliant data pipeline
+
+Generates engine-compatible patients (the 11 DiabetesRiskEngine features plus
+the four complication labels) in independent chunks. Chunk ``i`` always draws
+from ``SeedSequence(seed, spawn_key=(i,))``, so output is reproducible and
+identical regardless of how many worker processes produce it.
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
+FEATURE_COLUMNS = [
+    'age', 'bmi', 'hba1c', 'systolic_bp', 'diastolic_bp',
+    'ldl_cholesterol', 'hdl_cholesterol', 'triglycerides',
+    'smoking_status', 'diabetes_duration', 'renal_function'
+]
+LABEL_COLUMNS = [
+    'retinopathy_risk', 'neuropathy_risk',
+    'nephropathy_risk', 'cardiovascular_risk'
+]
+
+
+def generate_chunk(seed, chunk_index, chunk_size, patient_count):
+    """
+    Generate one chunk of synthetic patients from its own seed stream
+    Labels follow logistic risk models of the clinical features.
+    """
+    first_id = chunk_index * chunk_size
+    n = min(chunk_size, patient_count - first_id)
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+    age = np.clip(rng.normal(58, 12, n), 18, 95).round()
+    diabetes_duration = np.clip(rng.gamma(2.0, 4.0, n), 0, age - 10).round()
+    bmi = np.clip(rng.normal(31, 6, n), 16, 60).round(1)
+    hba1c = np.clip(rng.normal(7.8, 1.5, n) + 0.03 * diabetes_duration, 4.5, 15).round(1)
+    systolic_bp = np.clip(95 + 0.45 * age + 0.6 * bmi + rng.normal(0, 14, n), 85, 230).round()
+    diastolic_bp = np.clip(0.45 * systolic_bp + 20 + rng.normal(0, 7, n), 45, 125).round()
+    ldl_cholesterol = np.clip(rng.normal(110, 32, n), 35, 260).round(1)
+    hdl_cholesterol = np.clip(rng.normal(62, 10, n) - 0.45 * bmi, 20, 100).round(1)
+    triglycerides = np.clip(rng.lognormal(5.05, 0.45, n), 40, 900).round(1)
+    smoking_status = (rng.random(n) < 0.15).astype(np.int64)
+    renal_function = np.clip(
+        125 - 0.7 * age - 0.6 * diabetes_duration + rng.normal(0, 12, n), 10, 130
+    ).round(1)
+
+    risk_scores = {
+        'retinopathy_risk': 0.55 * (hba1c - 8) + 0.09 * (diabetes_duration - 8) + 0.02 * (systolic_bp - 135),
+        'neuropathy_risk': 0.45 * (hba1c - 8) + 0.04 * (age - 58) + 0.07 * (diabetes_duration - 8) - 0.3,
+        'nephropathy_risk': -0.06 * (renal_function - 75) + 0.025 * (systolic_bp - 135) + 0.3 * (hba1c - 8),
+        'cardiovascular_risk': (0.012 * (ldl_cholesterol - 110) - 0.03 * (hdl_cholesterol - 48)
+                                + 0.9 * smoking_status + 0.04 * (age - 58) + 0.02 * (systolic_bp - 135)),
+    }
+
+    data = {
+        'patient_id': np.arange(first_id + 1, first_id + n + 1),
+        'age': age.astype(np.int64),
+        'bmi': bmi,
+        'hba1c': hba1c,
+        'systolic_bp': systolic_bp.astype(np.int64),
+        'diastolic_bp': diastolic_bp.astype(np.int64),
+        'ldl_cholesterol': ldl_cholesterol,
+        'hdl_cholesterol': hdl_cholesterol,
+        'triglycerides': triglycerides,
+        'smoking_status': smoking_status,
+        'diabetes_duration': diabetes_duration.astype(np.int64),
+        'renal_function': renal_function,
+    }
+    for label, score in risk_scores.items():
+        data[label] = (rng.random(n) < 1 / (1 + np.exp(-score))).astype(np.int64)
+
+    return pd.DataFrame(data)
+
+
+def _write_chunk(seed, chunk_index, chunk_size, patient_count, output_dir, file_format):
+    """Generate and write one partition; module-level so worker processes can run it"""
+    chunk = generate_chunk(seed, chunk_index, chunk_size, patient_count)
+    path = os.path.join(output_dir, f"part-{chunk_index:05d}.{file_format}")
+    if file_format == 'parquet':
+        chunk.to_parquet(path, index=False)
+    else:
+        chunk.to_csv(path, index=False)
+    return path
+
+
 class SyntheticDataGenerator:
-    def __init__(self, patient_count=1000):
+    def __init__(self, patient_count=1000, seed=42, chunk_size=100_000):
         self.patient_count = patient_count
+        self.seed = seed
+        self.chunk_size = chunk_size
         print("✅ SyntheticDataGenerator initialized - NIW Evidence")
-        
+
+    @property
+    def chunk_count(self):
+        return -(-self.patient_count // self.chunk_size)
+
+    def iter_chunks(self):
+        """Yield the cohort chunk by chunk without holding it all in memory"""
+        for chunk_index in range(self.chunk_count):
+            yield generate_chunk(self.seed, chunk_index, self.chunk_size, self.patient_count)
+
     def generate_patients(self):
         """Generate synthetic patient data for MVP testing"""
-        np.random.seed(42)
-        
-        data = {
-            'patient_id': range(1, self.patient_count + 1),
-            'age': np.random.randint(30, 80, self.patient_count),
-            'bmi': np.round(np.random.uniform(18.5, 45, self.patient_count), 1),
-            'hba1c': np.round(np.random.uniform(5.0, 12.0, self.patient_count), 1),
-            'blood_pressure': np.random.randint(90, 180, self.patient_count),
-            'cholesterol': np.random.randint(150, 300, self.patient_count),
-        }
-        
-        df = pd.DataFrame(data)
+        df = pd.concat(self.iter_chunks(), ignore_index=True)
         print(f"✅ Generated {len(df)} synthetic patient records - NIW Evidence")
         return df
 
+    def write_partitioned(self, output_dir, file_format='parquet', n_workers=1):
+        """
+        Stream the cohort to one Parquet/CSV partition per chunk
+        NIW Evidence: Population-Scale Synthetic Data
+
+        Chunks are spread over ``n_workers`` processes; the files written do
+        not depend on the worker count.
+        """
+        if file_format not in ('parquet', 'csv'):
+            raise ValueError(f"Unsupported file format '{file_format}', expected 'parquet' or 'csv'")
+        os.makedirs(output_dir, exist_ok=True)
+
+        chunk_indices = list(range(self.chunk_count))
+        args = [
+            [self.seed] * len(chunk_indices), chunk_indices,
+            [self.chunk_size] * len(chunk_indices), [self.patient_count] * len(chunk_indices),
+            [output_dir] * len(chunk_indices), [file_format] * len(chunk_indices),
+        ]
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                paths = list(pool.map(_write_chunk, *args))
+        else:
+            paths = list(map(_write_chunk, *args))
+
+        print(f"✅ Wrote {self.patient_count} synthetic patients to {len(paths)} partitions - NIW Evidence")
+        return paths
+
 # NIW Proof - Working code
 if __name__ == "__main__":
     generator = SyntheticDataGenerator()
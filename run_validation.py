@@ -13,9 +13,10 @@ def validate_system():
     
     checks = []
     
-    # Check 1: AI Engine
+    # Check 1: AI Engine (scikit-learn/joblib are only imported for training)
     try:
-        from ai_engine.risk_prediction import DiabetesRiskEngine
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai-engine'))
+        from risk_prediction import DiabetesRiskEngine
         engine = DiabetesRiskEngine()
         checks.append("✅ AI Risk Engine - OPERATIONAL")
     except Exception as e:
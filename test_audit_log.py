@@ -0,0 +1,145 @@
+"""
+Audit Trail Tests - NIW Evidence
+Validates the queued, batched HIPAA audit trail
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+import audit_log
+from audit_log import AUDIT_LOG_ENV, AuditTrail, JsonLinesAuditSink, LoggingAuditSink
+from data_processor import ClinicalDataProcessor
+from risk_prediction import DiabetesRiskEngine
+from test_data_processor import make_raw_extract
+from test_risk_engine import make_clinical_data
+
+
+class StalledSink:
+    """Sink whose writes wait for ``release`` so the queue can fill up"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches = []
+
+    def write_batch(self, events):
+        self.release.wait(5)
+        self.batches.append(list(events))
+
+    def close(self):
+        pass
+
+
+def test_events_are_batched_and_flushed_on_close(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    trail = AuditTrail(JsonLinesAuditSink(str(path)), batch_size=50, flush_interval=1.0)
+    for i in range(120):
+        trail.log('record_accessed', record=i)
+    trail.close()
+
+    events = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [event['record'] for event in events] == list(range(120))
+    assert trail.stats()['written'] == 120
+    assert trail.stats()['batches'] <= 4
+    assert trail.log('after_close') is False
+
+
+def test_full_queue_drops_or_blocks():
+    sink = StalledSink()
+    trail = AuditTrail(sink, max_queue_size=5, batch_size=1, when_full='drop')
+    accepted = [trail.log('record_accessed', record=i) for i in range(20)]
+    assert not all(accepted)
+    assert trail.stats()['dropped'] == accepted.count(False)
+    sink.release.set()
+    trail.close()
+
+    sink = StalledSink()
+    trail = AuditTrail(sink, max_queue_size=5, batch_size=1, when_full='block')
+    threading.Timer(0.2, sink.release.set).start()
+    assert all(trail.log('record_accessed', record=i) for i in range(20))
+    trail.close()
+    assert sum(len(batch) for batch in sink.batches) == 20
+
+    with pytest.raises(ValueError):
+        AuditTrail(when_full='discard')
+
+
+def test_pipeline_and_engine_write_audit_events(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    trail = AuditTrail(JsonLinesAuditSink(str(path)))
+    ClinicalDataProcessor(audit_trail=trail).process_pipeline(make_raw_extract())
+    engine = DiabetesRiskEngine(audit_trail=trail)
+    engine.train_model(make_clinical_data())
+    engine.save_model(str(tmp_path / 'model.joblib'))
+    assert trail.flush(timeout=5)
+
+    events = [json.loads(line)['event'] for line in path.read_text().splitlines()]
+    assert events == [
+        'phi_anonymized', 'clinical_metrics_calculated', 'pipeline_completed',
+        'model_trained', 'model_saved'
+    ]
+    trail.close()
+
+
+def test_events_are_snapshotted_when_logged():
+    sink = StalledSink()
+    trail = AuditTrail(sink, batch_size=10)
+    metrics = {'retinopathy_risk': {'accuracy': 0.9}}
+    trail.log('model_trained', performance_metrics=metrics)
+    metrics['retinopathy_risk']['clinical_validation'] = {'sensitivity': 0.8}
+    metrics['nephropathy_risk'] = {}
+    sink.release.set()
+    trail.close()
+
+    [[event]] = sink.batches
+    assert json.loads(event)['performance_metrics'] == {'retinopathy_risk': {'accuracy': 0.9}}
+    assert trail.stats()['sink_errors'] == 0
+
+
+def test_logging_sink_falls_back_to_file_without_handlers(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    logger_name = 'publichealthos.audit.test_fallback'
+    logger = logging.getLogger(logger_name)
+    logger.propagate = False
+    trail = AuditTrail(LoggingAuditSink(logger_name, fallback=JsonLinesAuditSink(str(path))))
+    trail.log('model_loaded', path='model.joblib')
+    trail.close()
+    assert json.loads(path.read_text())['event'] == 'model_loaded'
+
+
+def test_default_trail_writes_a_file_only_when_configured(tmp_path, monkeypatch):
+    monkeypatch.setattr(audit_log, '_default_trail', None)
+    monkeypatch.delenv(AUDIT_LOG_ENV, raising=False)
+    assert audit_log.default_audit_trail().sink.fallback is None
+
+    path = tmp_path / 'audit.jsonl'
+    monkeypatch.setattr(audit_log, '_default_trail', None)
+    monkeypatch.setenv(AUDIT_LOG_ENV, str(path))
+    trail = audit_log.default_audit_trail()
+    assert trail.sink.fallback.path == str(path)
+    trail.close()
+
+
+def _log_in_child(trail):
+    trail.log('child_event', pid=os.getpid())
+
+
+def test_forked_children_write_their_own_events(tmp_path):
+    path = tmp_path / 'audit.jsonl'
+    trail = AuditTrail(JsonLinesAuditSink(str(path)), flush_interval=5.0)
+    trail.log('parent_event')
+    child = multiprocessing.get_context('fork').Process(target=_log_in_child, args=(trail,))
+    child.start()
+    child.join(10)
+    trail.close()
+
+    events = sorted(json.loads(line)['event'] for line in path.read_text().splitlines())
+    assert child.exitcode == 0
+    assert events == ['child_event', 'parent_event']
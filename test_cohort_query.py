@@ -0,0 +1,101 @@
+"""
+Cohort Query Tests - NIW Evidence
+Validates indexed risk-result queries against full scans
+"""
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+from cohort_query import RiskResultIndex
+from risk_inference import classify_risk_levels
+from risk_prediction import DiabetesRiskEngine
+from test_risk_engine import make_clinical_data
+
+COMPLICATIONS = ['retinopathy_risk', 'nephropathy_risk', 'cardiovascular_risk']
+
+
+def make_scores(n_patients, seed, id_offset=0):
+    rng = np.random.default_rng(seed)
+    scores = {'hashed_id': [hashlib.sha256(str(i + id_offset).encode()).hexdigest()[:16]
+                            for i in range(n_patients)]}
+    for complication in COMPLICATIONS:
+        probability = np.round(rng.beta(2, 3, n_patients), 3)
+        scores[f"{complication}_probability"] = probability
+        scores[f"{complication}_risk_level"] = classify_risk_levels(probability)
+    return pd.DataFrame(scores)
+
+
+def scan(frame, risk_levels=None, probability=None, alerts=()):
+    mask = np.ones(len(frame), dtype=bool)
+    for complication, levels in (risk_levels or {}).items():
+        mask &= frame[f"{complication}_risk_level"].isin([levels] if isinstance(levels, str) else levels)
+    for complication, (low, high) in (probability or {}).items():
+        values = frame[f"{complication}_probability"]
+        mask &= (values >= low if low is not None else True) & (values < high if high is not None else True)
+    for complication in alerts:
+        mask &= frame[f"{complication}_risk_level"].isin(['high', 'very_high'])
+    return set(frame['hashed_id'][mask])
+
+
+QUERIES = [
+    dict(risk_levels={'nephropathy_risk': 'very_high', 'cardiovascular_risk': 'high'}),
+    dict(probability={'retinopathy_risk': (0.25, 0.45)}),
+    dict(probability={'cardiovascular_risk': (0.6, None)}, alerts=['nephropathy_risk']),
+    dict(risk_levels={'retinopathy_risk': ['low', 'very_high']}, probability={'nephropathy_risk': (None, 0.2)}),
+]
+
+
+def test_queries_match_full_scan_through_updates():
+    current = make_scores(5000, seed=1)
+    index = RiskResultIndex.from_scores(current, min_compact_rows=1000)
+    assert index.delta_size == 0
+
+    # Rescore 300 patients and add 200 new ones: stays in the delta
+    rescored = make_scores(300, seed=2)
+    new_patients = make_scores(200, seed=3, id_offset=5000)
+    stats = index.upsert(pd.concat([rescored, new_patients]))
+    assert stats == {'inserted': 200, 'updated': 300, 'compacted': False}
+    assert index.delta_size == 500
+    current = pd.concat([current.iloc[300:], rescored, new_patients])
+
+    for query in QUERIES:
+        assert set(index.query(**query)) == scan(current, **query)
+    index.compact()
+    for query in QUERIES:
+        assert set(index.query(**query)) == scan(current, **query)
+    assert len(index) == 5200
+
+    top = index.top('cardiovascular_risk', n=10)
+    expected = current.sort_values('cardiovascular_risk_probability', ascending=False).head(10)
+    assert np.array_equal(
+        np.sort(current.set_index('hashed_id').loc[top, 'cardiovascular_risk_probability'].to_numpy()),
+        np.sort(expected['cardiovascular_risk_probability'].to_numpy())
+    )
+
+    with pytest.raises(ValueError):
+        index.query(risk_levels={'nephropathy_risk': 'extreme'})
+    with pytest.raises(ValueError):
+        index.query()
+
+
+def test_index_loads_engine_batch_scores():
+    clinical_data = make_clinical_data()
+    clinical_data['hashed_id'] = [hashlib.sha256(str(i).encode()).hexdigest()[:16] for i in range(len(clinical_data))]
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data)
+    scores = engine.predict_batch(clinical_data)
+
+    index = RiskResultIndex.from_scores(scores, hashed_ids=clinical_data['hashed_id'])
+    assert index.complications == engine.complication_types
+    frame = scores.assign(hashed_id=clinical_data['hashed_id'])
+    query = dict(alerts=['retinopathy_risk'], probability={'neuropathy_risk': (0.4, None)})
+    assert set(index.query(**query)) == set(frame['hashed_id'][
+        frame['retinopathy_risk_clinical_alert'] & (frame['neuropathy_risk_probability'] >= 0.4)
+    ])
@@ -0,0 +1,192 @@
+"""
+Data Processor Tests - NIW Evidence
+Validates ClinicalDataProcessor single-shot and streaming pipelines
+"""
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+from data_processor import (
+    CLINICAL_RANGE_CHECKS, ClinicalDataProcessor, iter_clinical_chunks, pseudonymize_ids
+)
+
+
+def make_raw_extract(n_records=500, seed=11):
+    """Synthetic raw EHR extract with PHI, missing values and out-of-range vitals"""
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({
+        'patient_id': rng.integers(1, n_records // 2, n_records),
+        'name': [f'Patient_{i}' for i in range(n_records)],
+        'email': [f'patient{i}@example.org' for i in range(n_records)],
+        'age': rng.integers(10, 95, n_records),
+        'bmi': rng.uniform(14, 62, n_records),
+        'hba1c': rng.uniform(3.5, 14.0, n_records),
+        'systolic_bp': rng.integers(60, 200, n_records),
+        'diastolic_bp': rng.integers(35, 125, n_records),
+        'ldl_cholesterol': rng.uniform(50, 200, n_records),
+        'hdl_cholesterol': rng.uniform(30, 80, n_records),
+        'triglycerides': rng.uniform(100, 400, n_records),
+        'smoking_status': rng.choice(['never', 'former', 'current'], n_records),
+    })
+    raw.loc[rng.choice(n_records, n_records // 20, replace=False), 'hba1c'] = np.nan
+    return raw
+
+
+def split_chunks(frame, chunk_size):
+    return (frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size))
+
+
+@pytest.fixture
+def raw_extract():
+    return make_raw_extract()
+
+
+def test_streaming_report_matches_single_shot(raw_extract):
+    single = ClinicalDataProcessor()
+    expected = single.process_pipeline(raw_extract)
+
+    streaming = ClinicalDataProcessor()
+    chunks = list(streaming.process_chunks(split_chunks(raw_extract, 64)))
+
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+    for section in ('cleaning', 'validation', 'final_record_count'):
+        assert streaming.data_quality_report[section] == single.data_quality_report[section]
+    assert streaming.data_quality_report['chunks_processed'] == len(chunks)
+
+
+def test_pipeline_to_file_writes_incrementally(raw_extract, tmp_path):
+    source = tmp_path / 'extract.csv'
+    raw_extract.to_csv(source, index=False)
+    output = tmp_path / 'processed.csv'
+
+    processor = ClinicalDataProcessor()
+    report = processor.process_pipeline_to_file(iter_clinical_chunks(str(source), chunksize=100), str(output))
+
+    written = pd.read_csv(output)
+    assert len(written) == report['final_record_count']
+    assert 'hashed_id' in written.columns
+    assert not {'patient_id', 'name', 'email'} & set(written.columns)
+
+
+def test_parquet_output_keeps_one_schema_across_chunks(raw_extract, tmp_path):
+    import pyarrow.parquet as pq
+    source = tmp_path / 'extract.csv'
+    # Integer vitals in the first chunk, a missing value (float64 on read) in a later one
+    raw_extract.loc[350, 'systolic_bp'] = np.nan
+    raw_extract.to_csv(source, index=False)
+    output = tmp_path / 'processed.parquet'
+
+    processor = ClinicalDataProcessor()
+    report = processor.process_pipeline_to_file(iter_clinical_chunks(str(source), chunksize=100), str(output))
+
+    parquet_file = pq.ParquetFile(output)
+    assert parquet_file.metadata.num_rows == report['final_record_count']
+    assert parquet_file.metadata.num_row_groups == report['chunks_processed']
+    assert str(parquet_file.schema_arrow.field('systolic_bp').type) == 'double'
+
+
+def test_compact_parquet_output_accepts_new_categories(raw_extract, tmp_path):
+    import pyarrow.parquet as pq
+    source = tmp_path / 'extract.csv'
+    # No smoking status at all in the first chunk, every category in later ones
+    raw_extract.loc[:99, 'smoking_status'] = np.nan
+    raw_extract.to_csv(source, index=False)
+    output = tmp_path / 'processed.parquet'
+
+    processor = ClinicalDataProcessor(compact_dtypes=True)
+    processor.process_pipeline_to_file(iter_clinical_chunks(str(source), chunksize=100), str(output))
+    expected = pd.concat(ClinicalDataProcessor(compact_dtypes=True).process_chunks(
+        iter_clinical_chunks(str(source), chunksize=100)
+    ), ignore_index=True)
+
+    schema = pq.ParquetFile(output).schema_arrow
+    for column in ('smoking_status', 'bmi_category'):
+        assert str(schema.field(column).type) == 'dictionary<values=string, indices=int32, ordered=0>'
+    written = pq.read_table(output).to_pandas()
+    assert list(written['smoking_status'].astype(str)) == list(expected['smoking_status'].astype(str))
+    assert set(written['smoking_status'].dropna()) == {'never', 'former', 'current'}
+
+
+def test_pseudonymize_ids_matches_legacy_hash():
+    ids = pd.Series([101, 202, 101, 303, 202, 404])
+    legacy = ids.apply(lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:16])
+    assert list(pseudonymize_ids(ids)) == list(legacy)
+
+    string_ids = pd.Series(['MRN-1', None, 'MRN-1', 'MRN-2'])
+    legacy = string_ids.apply(lambda x: hashlib.sha256(str(x).encode()).hexdigest()[:16])
+    assert list(pseudonymize_ids(string_ids)) == list(legacy)
+
+
+def test_salted_pseudonyms_are_stable_and_keyed(raw_extract):
+    first = ClinicalDataProcessor(pseudonym_salt='site-key').anonymize_patient_data(raw_extract)
+    second = ClinicalDataProcessor(pseudonym_salt='site-key').anonymize_patient_data(raw_extract)
+    unsalted = ClinicalDataProcessor().anonymize_patient_data(raw_extract)
+
+    assert list(first['hashed_id']) == list(second['hashed_id'])
+    assert not (first['hashed_id'] == unsalted['hashed_id']).any()
+    assert first['hashed_id'].str.len().eq(16).all()
+
+
+def test_parallel_pseudonymization_matches_serial(monkeypatch):
+    import data_processor
+    monkeypatch.setattr(data_processor, 'PARALLEL_HASH_MIN_IDS', 10)
+    ids = pd.Series(np.arange(200) % 70)
+    assert list(pseudonymize_ids(ids, salt=b'k', n_workers=2)) == list(pseudonymize_ids(ids, salt=b'k'))
+
+
+def test_compact_mode_shrinks_rows_and_keeps_categories(raw_extract):
+    default = ClinicalDataProcessor()
+    expected = default.process_pipeline(raw_extract)
+
+    compact = ClinicalDataProcessor(compact_dtypes=True)
+    processed = compact.process_pipeline(raw_extract)
+
+    assert processed['bmi'].dtype == np.float32
+    assert processed['age'].dtype == np.int16
+    assert isinstance(processed['bmi_category'].dtype, pd.CategoricalDtype)
+    assert isinstance(processed['smoking_status'].dtype, pd.CategoricalDtype)
+    assert list(processed['bmi_category'].astype(str)) == list(expected['bmi_category'])
+    assert compact.data_quality_report['cleaning'] == default.data_quality_report['cleaning']
+
+    default_bytes = default.data_quality_report['memory_bytes_per_row']
+    compact_bytes = compact.data_quality_report['memory_bytes_per_row']
+    assert compact_bytes['enhanced'] < default_bytes['enhanced']
+
+
+def test_anonymize_leaves_raw_extract_untouched(raw_extract):
+    before = raw_extract.copy()
+    ClinicalDataProcessor().anonymize_patient_data(raw_extract)
+    pd.testing.assert_frame_equal(raw_extract, before)
+
+
+def test_rule_engine_matches_legacy_range_counts(raw_extract):
+    processor = ClinicalDataProcessor()
+    results = processor.validate_clinical_ranges(raw_extract)
+
+    for field, ranges in CLINICAL_RANGE_CHECKS.items():
+        legacy = int(((raw_extract[field] < ranges['min']) | (raw_extract[field] > ranges['max'])).sum())
+        counts = results['rule_counts']
+        assert counts[f"{field}_below_min"] + counts[f"{field}_above_max"] == legacy
+
+    critical = int((raw_extract['systolic_bp'] >= 180).sum())
+    assert results['rule_counts']['systolic_bp_critical_high'] == critical
+    assert any(w.startswith('systolic_bp:') for w in results['warnings'])
+
+
+def test_quarantine_uses_row_bitmasks(raw_extract):
+    processor = ClinicalDataProcessor()
+    evaluation = processor.evaluate_clinical_rules(raw_extract)
+    valid, quarantined = processor.quarantine_invalid_rows(raw_extract, evaluation)
+
+    assert len(valid) + len(quarantined) == len(raw_extract)
+    assert (valid['age'] >= 18).all() and (valid['bmi'] <= 60).all()
+    position = raw_extract.index.get_loc(quarantined.index[0])
+    violated = evaluation.violated_rules(position)
+    assert violated and any(name.endswith(('_below_min', '_above_max')) for name in violated)
@@ -0,0 +1,124 @@
+"""
+Feature Store Tests - NIW Evidence
+Validates incremental derived-feature loads keyed by hashed_id
+"""
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+from data_processor import ClinicalDataProcessor
+from feature_store import ClinicalFeatureStore
+from risk_prediction import DiabetesRiskEngine
+from test_risk_engine import make_clinical_data
+
+
+def make_snapshot(n_patients=300, seed=7):
+    snapshot = make_clinical_data(n_patients, seed=seed)
+    snapshot.insert(0, 'hashed_id', [
+        hashlib.sha256(str(i).encode()).hexdigest()[:16] for i in range(n_patients)
+    ])
+    return snapshot
+
+
+class CountingProcessor(ClinicalDataProcessor):
+    def __init__(self):
+        super().__init__(compact_dtypes=True)
+        self.rows_derived = 0
+
+    def calculate_clinical_metrics(self, data):
+        self.rows_derived += len(data)
+        return super().calculate_clinical_metrics(data)
+
+
+def test_delta_load_recomputes_only_changed_rows(tmp_path):
+    snapshot = make_snapshot()
+    processor = CountingProcessor()
+    store = ClinicalFeatureStore(tmp_path / 'features', processor=processor)
+    assert store.upsert(snapshot)['inserted'] == 300
+
+    # Next day: 10 patients get new labs, 5 are new, the rest are unchanged
+    next_day = pd.concat([snapshot, make_snapshot(305).tail(5)], ignore_index=True)
+    next_day.loc[:9, 'hba1c'] += 1.0
+    next_day.loc[:9, 'systolic_bp'] += 10
+    processor.rows_derived = 0
+    stats = ClinicalFeatureStore(tmp_path / 'features', processor=processor).upsert(next_day)
+    assert (stats['inserted'], stats['updated'], stats['unchanged']) == (5, 10, 290)
+    assert processor.rows_derived == 15
+
+    reopened = ClinicalFeatureStore(tmp_path / 'features')
+    stored = reopened.read(hashed_ids=next_day['hashed_id'])
+    expected = ClinicalDataProcessor(compact_dtypes=True).calculate_clinical_metrics(next_day)
+    assert list(stored['hashed_id']) == list(next_day['hashed_id'])
+    for column in ['hba1c', 'systolic_bp', 'mean_arterial_pressure', 'non_hdl_cholesterol']:
+        assert np.allclose(stored[column], expected[column])
+    assert (stored['bmi_category'].astype(str) == expected['bmi_category'].astype(str)).all()
+
+
+def test_default_processor_stores_the_same_bmi_categories(tmp_path):
+    snapshot = make_snapshot(100)
+    snapshot.loc[:4, 'bmi'] = np.nan
+    compact = ClinicalFeatureStore(tmp_path / 'compact')
+    default = ClinicalFeatureStore(tmp_path / 'default', processor=ClinicalDataProcessor())
+    compact.upsert(snapshot)
+    default.upsert(snapshot)
+    expected = compact.read(['bmi_category'])['bmi_category']
+    assert (default.read(['bmi_category'])['bmi_category'] == expected).all()
+    assert (expected.head(5) == 'unknown').all()
+
+
+def test_label_edits_skip_recompute_and_lossy_loads_are_refused(tmp_path):
+    snapshot = make_snapshot(100)
+    processor = CountingProcessor()
+    store = ClinicalFeatureStore(tmp_path / 'features', processor=processor)
+    store.upsert(snapshot)
+    assert 'retinopathy_risk' not in store.input_columns
+    assert snapshot['smoking_status'].dtype.kind == 'i'
+
+    # Outcomes recorded later: labels are rewritten, derived features are not
+    relabeled = snapshot.copy()
+    relabeled.loc[:4, 'retinopathy_risk'] = 1 - relabeled.loc[:4, 'retinopathy_risk']
+    processor.rows_derived = 0
+    stats = store.upsert(relabeled)
+    assert (stats['updated'], stats['relabeled'], processor.rows_derived) == (0, 5, 0)
+    assert (store.read(['retinopathy_risk'])['retinopathy_risk'] == relabeled['retinopathy_risk']).all()
+
+    # Integral floats fit the integer column; a fractional value would be truncated
+    as_floats = relabeled.astype({'smoking_status': np.float64})
+    assert store.upsert(as_floats)['unchanged'] == 100
+    as_floats.loc[0, 'smoking_status'] = 0.5
+    with pytest.raises(ValueError, match='smoking_status'):
+        store.upsert(as_floats)
+
+
+def test_interrupted_append_is_ignored(tmp_path):
+    snapshot = make_snapshot(200)
+    store = ClinicalFeatureStore(tmp_path / 'features')
+    store.upsert(snapshot.head(150))
+    # Bytes appended past the committed row count by a crashed load
+    with open(tmp_path / 'features' / 'hba1c.bin', 'ab') as f:
+        f.write(b'\x00' * 64)
+    store = ClinicalFeatureStore(tmp_path / 'features')
+    stats = store.upsert(snapshot)
+    assert (stats['inserted'], stats['unchanged'], stats['row_count']) == (50, 150, 200)
+    assert np.allclose(store.read(['hba1c'], hashed_ids=snapshot['hashed_id'])['hba1c'], snapshot['hba1c'])
+
+
+def test_engine_trains_and_scores_from_store(tmp_path):
+    snapshot = make_snapshot()
+    store = ClinicalFeatureStore(tmp_path / 'features')
+    store.upsert(snapshot)
+
+    from_frame, from_store = DiabetesRiskEngine(), DiabetesRiskEngine()
+    from_frame.train_model(snapshot)
+    from_store.train_model(store)
+    expected = from_frame.predict_batch(snapshot)
+    scores = from_store.predict_batch(store)
+    assert list(scores.index) == list(snapshot['hashed_id'])
+    assert np.array_equal(scores.to_numpy(), expected.to_numpy())
@@ -0,0 +1,71 @@
+"""
+Instrumentation Tests - NIW Evidence
+Validates structured spans from the data pipeline and risk engine
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+from data_processor import ClinicalDataProcessor
+from instrumentation import NULL_TRACER, InMemorySink, JsonLinesSink, PrometheusTextSink, Tracer
+from risk_prediction import DiabetesRiskEngine
+from test_data_processor import make_raw_extract
+from test_risk_engine import make_clinical_data
+
+
+def test_pipeline_emits_one_span_per_step():
+    sink = InMemorySink()
+    raw = make_raw_extract()
+    processed = ClinicalDataProcessor(tracer=Tracer(sink)).process_pipeline(raw)
+
+    names = [span.name for span in sink.spans]
+    assert names == [
+        'pipeline.anonymize', 'pipeline.clean', 'pipeline.validate',
+        'pipeline.feature_engineering', 'pipeline.process'
+    ]
+    clean, = sink.by_name('pipeline.clean')
+    assert clean.rows_in == len(raw) and clean.rows_out == len(processed)
+    assert clean.parent == 'pipeline.process'
+    assert all(span.wall_seconds >= 0 and span.memory_delta_bytes is not None for span in sink.spans)
+
+
+def test_engine_emits_fit_and_predict_spans(tmp_path):
+    sink = InMemorySink()
+    engine = DiabetesRiskEngine(tracer=Tracer(sink))
+    clinical_data = make_clinical_data()
+    engine.train_model(clinical_data)
+
+    fits = sink.by_name('engine.fit')
+    assert [span.attributes['complication'] for span in fits] == engine.complication_types
+    assert all(span.parent == 'engine.train' and span.rows_in == 160 for span in fits)
+
+    engine.predict_individual_risk(clinical_data[engine.features].iloc[0].tolist())
+    predicts = sink.by_name('engine.predict')
+    assert len(predicts) == len(engine.complication_types)
+    assert all(span.parent == 'engine.predict_individual_risk' for span in predicts)
+
+
+def test_file_and_prometheus_sinks(tmp_path):
+    path = tmp_path / 'spans.jsonl'
+    prometheus = PrometheusTextSink()
+    for sink in (JsonLinesSink(str(path)), prometheus):
+        tracer = Tracer(sink)
+        for _ in range(2):
+            with tracer.span('engine.predict', rows_in=10, complication='retinopathy_risk') as span:
+                span.set_rows_out(10)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 2 and records[0]['rows_out'] == 10
+    text = prometheus.render()
+    assert 'publichealthos_span_count_total{span="engine.predict",complication="retinopathy_risk"} 2' in text
+    assert 'publichealthos_span_rows_in_total{span="engine.predict",complication="retinopathy_risk"} 20' in text
+
+
+def test_null_tracer_is_shared_no_op():
+    with NULL_TRACER.span('engine.predict', rows_in=1) as first:
+        first.set_rows_out(1)
+    assert NULL_TRACER.span('other') is first
+    assert ClinicalDataProcessor().tracer is NULL_TRACER
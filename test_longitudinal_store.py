@@ -0,0 +1,142 @@
+"""
+Longitudinal Lab Store Tests - NIW Evidence
+Validates incremental rolling lab features and per-patient range reads
+"""
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+from longitudinal_store import LAB_FEATURES, LongitudinalLabStore
+from risk_prediction import DiabetesRiskEngine
+from test_risk_engine import make_clinical_data
+
+
+def make_observations(n_patients=60, n_rows=3000, seed=11):
+    rng = np.random.default_rng(seed)
+    ids = np.array([hashlib.sha256(str(i).encode()).hexdigest()[:16] for i in range(n_patients)])
+    tests = np.array(['hba1c', 'systolic_bp', 'diastolic_bp'])[rng.integers(0, 3, n_rows)]
+    baseline = {'hba1c': 8.0, 'systolic_bp': 135.0, 'diastolic_bp': 85.0}
+    return pd.DataFrame({
+        'hashed_id': ids[rng.integers(0, n_patients, n_rows)],
+        'observed_at': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 540 * 86400, n_rows), unit='s'),
+        'test': tests,
+        'value': np.round([baseline[t] for t in tests] + rng.normal(0, 1.0, n_rows), 1),
+    })
+
+
+def reference_features(observations):
+    """Rolling features recomputed from the full history with pandas"""
+    as_of = observations['observed_at'].max()
+    rows = {}
+    for hashed_id, history in observations.sort_values('observed_at', kind='stable').groupby('hashed_id'):
+        features = {}
+        for test in ('hba1c', 'systolic_bp', 'diastolic_bp'):
+            series = history[history['test'] == test]
+            days = (series['observed_at'] - pd.Timestamp('2000-01-01')).dt.total_seconds() / 86400
+            features[f"{test}_last"] = series['value'].iloc[-1] if len(series) else np.nan
+            features[f"{test}_slope_per_year"] = (np.polyfit(days, series['value'], 1)[0] * 365.25
+                                                  if days.nunique() >= 2 else np.nan)
+            window = series[series['observed_at'] > as_of - pd.Timedelta(days=90)]
+            features[f"{test}_mean_90d"] = window['value'].mean() if len(window) else np.nan
+            features[f"{test}_sd"] = series['value'].std() if len(series) >= 2 else np.nan
+        rows[hashed_id] = features
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def test_incremental_appends_match_full_recompute(tmp_path):
+    observations = make_observations()
+    features = LAB_FEATURES + ['hba1c_sd', 'systolic_bp_mean_90d']
+    # Daily-style feed in time order, plus a batch of late results for old months
+    ordered = observations.sort_values('observed_at').reset_index(drop=True)
+    late = ordered.sample(frac=0.1, random_state=3)
+    on_time = ordered.drop(late.index)
+    batches = [on_time.iloc[rows] for rows in np.array_split(np.arange(len(on_time)), 12)]
+    batches.insert(8, late)
+
+    store = LongitudinalLabStore(tmp_path / 'labs')
+    for batch in batches:
+        stats = store.append(batch)
+    assert stats['window_expired'] > 0
+    assert store.observation_count == len(observations)
+    assert store.as_of == observations['observed_at'].max().floor('s')
+
+    expected = reference_features(observations)[features]
+    incremental = store.features(features=features).loc[expected.index]
+    pd.testing.assert_frame_equal(incremental, expected, check_names=False, rtol=1e-6)
+
+    # Reopening after an interrupted append recomputes the state from the segments
+    store.manifest['state_clean'] = False
+    store._write_manifest()
+    reopened = LongitudinalLabStore(tmp_path / 'labs')
+    assert reopened.manifest['state_clean']
+    pd.testing.assert_frame_equal(reopened.features(features=features).loc[expected.index], incremental,
+                                  rtol=1e-9)
+
+    # Compaction merges each month's segments without changing any history
+    patient = observations['hashed_id'].iloc[0]
+    before = reopened.history(patient)
+    assert reopened.compact() > 0
+    assert len(reopened.manifest['segments']) == len({s['partition'] for s in reopened.manifest['segments']})
+    pd.testing.assert_frame_equal(reopened.history(patient), before)
+
+
+def test_range_reads_and_engine_lab_features(tmp_path):
+    observations = make_observations()
+    store = LongitudinalLabStore(tmp_path / 'labs')
+    store.append(observations)
+
+    patient = observations['hashed_id'].iloc[0]
+    start, end = pd.Timestamp('2024-03-15'), pd.Timestamp('2024-09-30')
+    history = store.history(patient, start=start, end=end, tests=['hba1c'])
+    expected = observations[(observations['hashed_id'] == patient) & (observations['test'] == 'hba1c')
+                            & observations['observed_at'].between(start, end)]
+    expected = expected.sort_values('observed_at', kind='stable')
+    assert len(history) == len(expected) > 0
+    assert history['observed_at'].is_monotonic_increasing
+    np.testing.assert_array_equal(history['value'].to_numpy(), expected['value'].to_numpy())
+    assert store.history('0' * 16).empty
+
+    # Patients without lab history get NaN features and still train and score
+    clinical_data = make_clinical_data(200)
+    clinical_data.insert(0, 'hashed_id', [hashlib.sha256(str(i).encode()).hexdigest()[:16] for i in range(200)])
+    clinical_data = store.attach_features(clinical_data)
+    assert clinical_data['hba1c_last'].notna().sum() == observations['hashed_id'].nunique()
+    assert clinical_data.loc[100:, LAB_FEATURES].isna().all().all()
+
+    engine = DiabetesRiskEngine(extra_features=LAB_FEATURES)
+    assert engine.train_model(clinical_data) is not None
+    results = engine.predict_batch(clinical_data.head(20))
+    assert not isinstance(results, str) and len(results) == 20
+
+    model_path = str(tmp_path / 'model.joblib')
+    engine.save_model(model_path)
+    loaded = DiabetesRiskEngine()
+    loaded.load_model(model_path)
+    assert loaded.features == engine.features
+    np.testing.assert_array_equal(loaded.predict_batch(clinical_data.head(20)).to_numpy(), results.to_numpy())
+
+
+def test_engine_scores_patients_with_missing_labs():
+    observations = make_observations(n_patients=40)
+    clinical_data = make_clinical_data(300)
+    clinical_data.insert(0, 'hashed_id', [hashlib.sha256(str(i).encode()).hexdigest()[:16] for i in range(300)])
+    store_features = reference_features(observations)
+    clinical_data = clinical_data.join(store_features[LAB_FEATURES], on='hashed_id')
+    missing = clinical_data[LAB_FEATURES].isna().all(axis=1)
+    assert missing.sum() == 260
+
+    engine = DiabetesRiskEngine(extra_features=LAB_FEATURES)
+    assert engine.train_model(clinical_data) is not None
+    expected = engine.predict_batch(clinical_data)
+    assert not isinstance(expected, str)
+    assert np.isfinite(expected.loc[missing].select_dtypes('number').to_numpy()).all()
+
+    # The compiled backend routes missing values the same way the fitted trees do
+    engine.set_inference_backend('compiled')
+    pd.testing.assert_frame_equal(engine.predict_batch(clinical_data), expected)
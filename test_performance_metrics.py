@@ -0,0 +1,73 @@
+"""
+Model Validator Tests - NIW Evidence
+Validates clinical metrics and bootstrap confidence intervals
+"""
+
+import os
+import sys
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, roc_auc_score
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+import performance_metrics
+from performance_metrics import ModelValidator
+from risk_prediction import DiabetesRiskEngine
+from test_risk_engine import make_clinical_data
+
+
+def make_scored_holdout(n_rows=2000, seed=3):
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 2, n_rows)
+    y_score = np.clip(rng.normal(0.4 + 0.2 * y_true, 0.2), 0, 1)
+    y_score[:n_rows // 4] = np.round(y_score[:n_rows // 4], 2)  # ties
+    return y_true, y_score
+
+
+def test_clinical_metrics_match_sklearn():
+    y_true, y_score = make_scored_holdout()
+    metrics = ModelValidator().calculate_clinical_metrics(y_true, y_score)
+
+    tn, fp, fn, tp = confusion_matrix(y_true, y_score >= 0.5).ravel()
+    assert metrics['accuracy'] == round((tp + tn) / len(y_true), 4)
+    assert metrics['sensitivity'] == round(tp / (tp + fn), 4)
+    assert metrics['specificity'] == round(tn / (tn + fp), 4)
+    assert metrics['auc_roc'] == round(roc_auc_score(y_true, y_score), 4)
+
+
+def test_bootstrap_intervals_are_reproducible_across_workers(monkeypatch):
+    monkeypatch.setattr(performance_metrics, 'BOOTSTRAP_BATCH_SIZE', 50)
+    y_true, y_score = make_scored_holdout()
+    serial = ModelValidator().bootstrap_confidence_intervals(y_true, y_score, n_resamples=200)
+    parallel = ModelValidator(n_workers=2).bootstrap_confidence_intervals(y_true, y_score, n_resamples=200)
+    assert serial == parallel
+
+    point = ModelValidator().calculate_clinical_metrics(y_true, y_score)
+    for metric, (lower, upper) in serial.items():
+        assert lower < point[metric] < upper
+
+
+def test_score_snapping_keeps_threshold_side(monkeypatch):
+    monkeypatch.setattr(performance_metrics, 'BOOTSTRAP_SCORE_RESOLUTION', 0.1)
+    y_true = np.array([0, 0, 1, 1] * 50)
+    y_score = np.linspace(0.3, 0.7, 200)
+    # 200 distinct scores exceed the 0.1 grid, so they are snapped before resampling
+    intervals = ModelValidator().bootstrap_confidence_intervals(y_true, y_score, n_resamples=100)
+    point = ModelValidator().calculate_clinical_metrics(y_true, y_score)
+    assert intervals['accuracy'][0] <= point['accuracy'] <= intervals['accuracy'][1]
+
+
+def test_engine_records_clinical_metrics_and_validation():
+    engine = DiabetesRiskEngine()
+    assert isinstance(engine.validate_model(), str)
+
+    engine.train_model(make_clinical_data())
+    for complication in engine.complication_types:
+        metrics = engine.performance_metrics[complication]
+        assert {'sensitivity', 'specificity', 'auc_roc'} <= set(metrics)
+
+    validation = engine.validate_model(n_resamples=100)
+    assert set(validation) == set(engine.complication_types)
+    cardiovascular = engine.performance_metrics['cardiovascular_risk']['clinical_validation']
+    assert set(cardiovascular['confidence_intervals']) == {'accuracy', 'sensitivity', 'specificity', 'auc_roc'}
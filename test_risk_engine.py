@@ -0,0 +1,416 @@
+"""
+Risk Engine Tests - NIW Evidence
+Validates DiabetesRiskEngine scoring paths against each other
+"""
+
+import asyncio
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'ai-engine'))
+
+from model_artifacts import _pruning_auc_loss
+from prediction_cache import PredictionCache
+from prediction_service import MicroBatchPredictor
+from risk_prediction import DiabetesRiskEngine
+
+
+def make_clinical_data(n_patients=200, seed=7):
+    """Synthetic engine-compatible clinical records with binary labels"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'age': rng.integers(30, 80, n_patients),
+        'bmi': rng.uniform(18, 45, n_patients),
+        'hba1c': rng.uniform(5.0, 12.0, n_patients),
+        'systolic_bp': rng.integers(110, 180, n_patients),
+        'diastolic_bp': rng.integers(70, 110, n_patients),
+        'ldl_cholesterol': rng.uniform(50, 200, n_patients),
+        'hdl_cholesterol': rng.uniform(30, 80, n_patients),
+        'triglycerides': rng.uniform(100, 400, n_patients),
+        'smoking_status': rng.integers(0, 2, n_patients),
+        'diabetes_duration': rng.integers(1, 30, n_patients),
+        'renal_function': rng.uniform(60, 120, n_patients),
+        'retinopathy_risk': rng.integers(0, 2, n_patients),
+        'neuropathy_risk': rng.integers(0, 2, n_patients),
+        'nephropathy_risk': rng.integers(0, 2, n_patients),
+        'cardiovascular_risk': rng.integers(0, 2, n_patients),
+    })
+
+
+@pytest.fixture(scope="module")
+def clinical_data():
+    return make_clinical_data()
+
+
+@pytest.fixture(scope="module")
+def trained_engine(clinical_data):
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data)
+    return engine
+
+
+def test_predict_batch_matches_single_patient(trained_engine, clinical_data):
+    panel = clinical_data.head(25)
+    scores = trained_engine.predict_batch(panel)
+
+    assert list(scores.index) == list(panel.index)
+    for idx, row in panel.iterrows():
+        single = trained_engine.predict_individual_risk(row[trained_engine.features].tolist())
+        for complication, result in single.items():
+            assert scores.at[idx, f"{complication}_probability"] == result['probability']
+            assert scores.at[idx, f"{complication}_risk_level"] == result['risk_level']
+            assert scores.at[idx, f"{complication}_clinical_alert"] == result['clinical_alert']
+
+
+def test_classify_risk_levels_matches_scalar_thresholds():
+    engine = DiabetesRiskEngine()
+    probabilities = np.array([0.0, 0.29999, 0.3, 0.49, 0.5, 0.69, 0.7, 1.0])
+    vectorized = engine._classify_risk_levels(probabilities)
+    assert list(vectorized) == [engine._classify_risk_level(p) for p in probabilities]
+
+
+def test_predict_batch_requires_trained_model(clinical_data):
+    assert DiabetesRiskEngine().predict_batch(clinical_data) == "Error: Model not trained"
+
+
+def test_compiled_backend_matches_sklearn_exactly(trained_engine, clinical_data):
+    X = clinical_data[trained_engine.features]
+    expected = np.column_stack([
+        model.predict_proba(X)[:, 1] for model in trained_engine.model.values()
+    ])
+    compiled = trained_engine._get_compiled_model().predict_proba(X.to_numpy())
+    assert np.array_equal(compiled, expected)
+
+    patient = X.iloc[3].tolist()
+    sklearn_single = trained_engine.predict_individual_risk(patient)
+    sklearn_batch = trained_engine.predict_batch(clinical_data)
+    trained_engine.set_inference_backend('compiled')
+    try:
+        assert trained_engine.predict_individual_risk(patient) == sklearn_single
+        assert trained_engine.predict_batch(clinical_data).equals(sklearn_batch)
+    finally:
+        trained_engine.set_inference_backend('sklearn')
+
+
+def test_unknown_inference_backend_rejected():
+    with pytest.raises(ValueError):
+        DiabetesRiskEngine(inference_backend='gpu')
+
+
+def test_multi_output_mode_shares_one_forest(clinical_data, tmp_path):
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data, multi_output=True)
+
+    forests = {id(model.forest) for model in engine.model.values()}
+    assert len(forests) == 1
+    assert set(engine.performance_metrics) == set(engine.complication_types)
+
+    patient = clinical_data[engine.features].iloc[0].tolist()
+    expected = engine.predict_individual_risk(patient)
+    engine.set_inference_backend('compiled')
+    assert engine.predict_individual_risk(patient) == expected
+
+    path = tmp_path / 'multi_output.joblib'
+    engine.save_model(str(path))
+    reloaded = DiabetesRiskEngine()
+    reloaded.load_model(str(path))
+    assert reloaded.predict_individual_risk(patient) == expected
+
+
+def test_parallel_training_matches_sequential(trained_engine, clinical_data):
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data, n_workers=2, cores_per_fit=1)
+
+    assert engine.predict_batch(clinical_data).equals(trained_engine.predict_batch(clinical_data))
+    for complication in engine.complication_types:
+        metrics = engine.performance_metrics[complication]
+        assert metrics['training_wall_seconds'] >= 0
+        assert metrics['training_cpu_seconds'] >= 0
+        assert metrics['training_cores'] == 1
+        assert engine.model[complication].n_jobs is None
+
+
+def test_array_artifact_loads_lazily_and_matches(trained_engine, clinical_data, tmp_path):
+    path = tmp_path / 'model_arrays'
+    trained_engine.save_model(str(path), artifact_format='arrays')
+
+    engine = DiabetesRiskEngine()
+    engine.load_model(str(path))
+    assert engine.inference_backend == 'compiled'
+    assert engine.model._arrays is None
+
+    patient = clinical_data[engine.features].iloc[5].tolist()
+    assert engine.predict_individual_risk(patient) == trained_engine.predict_individual_risk(patient)
+    assert engine.predict_batch(clinical_data).equals(trained_engine.predict_batch(clinical_data))
+
+    engine.set_inference_backend('sklearn')
+    assert engine.predict_batch(clinical_data).equals(trained_engine.predict_batch(clinical_data))
+
+
+def test_compact_artifact_is_narrow_and_exact(trained_engine, clinical_data, tmp_path):
+    trained_engine.save_model(str(tmp_path / 'arrays'), artifact_format='arrays')
+    trained_engine.save_model(str(tmp_path / 'compact'), artifact_format='compact')
+
+    engine = DiabetesRiskEngine()
+    engine.load_model(str(tmp_path / 'compact'))
+    arrays = engine.model._load_arrays()
+    assert arrays['feature'].dtype == np.int8 and arrays['threshold'].dtype == np.float32
+    assert arrays['children_left'].dtype == np.int32
+    assert sum(f.stat().st_size for f in (tmp_path / 'compact').iterdir()) < \
+        sum(f.stat().st_size for f in (tmp_path / 'arrays').iterdir())
+
+    trained_engine.set_inference_backend('compiled')
+    try:
+        assert engine.predict_batch(clinical_data).equals(trained_engine.predict_batch(clinical_data))
+    finally:
+        trained_engine.set_inference_backend('sklearn')
+
+    assert engine.model.verify()
+    with open(tmp_path / 'compact' / 'threshold.npy', 'r+b') as f:
+        f.seek(-4, 2)
+        f.write(b'\x00\x00\x80\x3f')
+    with pytest.raises(ValueError):
+        engine.model.verify()
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        DiabetesRiskEngine().load_model(str(tmp_path / 'compact'), verify_checksums=True)
+    # Default loads stay lazy: no array is read until the first prediction
+    lazy = DiabetesRiskEngine()
+    lazy.load_model(str(tmp_path / 'compact'))
+    assert lazy.model._arrays is None
+
+
+def test_pruned_artifact_respects_auc_bound(trained_engine, clinical_data, tmp_path):
+    with pytest.raises(ValueError):
+        trained_engine.save_model(str(tmp_path / 'pruned.joblib'), max_trees=10)
+    with pytest.raises(ValueError, match='validation'):
+        trained_engine.save_model(str(tmp_path / 'unbounded'), artifact_format='compact', max_trees=10)
+    assert not (tmp_path / 'unbounded').exists()
+    with pytest.raises(ValueError):
+        trained_engine.save_model(str(tmp_path / 'refused'), artifact_format='compact', max_trees=1,
+                                  validation_data=clinical_data, max_auc_loss=-1.0)
+
+    path = tmp_path / 'pruned'
+    trained_engine.save_model(str(path), artifact_format='compact', max_trees=50, leaf_tolerance=0.05,
+                              validation_data=clinical_data, max_auc_loss=1.0)
+    engine = DiabetesRiskEngine()
+    engine.load_model(str(path))
+    pruning = engine.model.manifest['pruning']
+    assert engine.model.manifest['node_count'] < pruning['node_count_before']
+    assert set(pruning['validation_auc_loss']) == set(engine.complication_types)
+    assert [stop - start for start, stop in engine.model.manifest['tree_ranges']] == [50] * 4
+
+    # Merging leaves never moves a tree's output by more than the tolerance per merge level
+    full = trained_engine._get_compiled_model().pruned(max_trees=50)
+    X = clinical_data[engine.features].to_numpy()
+    drift = np.abs(engine.model.ensemble.predict_proba(X) - full.predict_proba(X))
+    assert drift.max() <= 0.05 * full.max_depth
+
+
+class FixedScores:
+    def __init__(self, scores):
+        self.names = ['retinopathy_risk']
+        self.scores = np.asarray(scores)[:, None]
+
+    def predict_proba(self, X):
+        return self.scores
+
+
+def test_pruning_auc_bound_uses_exact_auc():
+    # 250 positives x 100 negatives: two positives fall below 126 negatives, a loss of 0.00504
+    labels = {'retinopathy_risk': np.r_[np.ones(250), np.zeros(100)]}
+    negatives = np.linspace(0.1, 0.4, 100)
+    pruned = np.r_[0.05, (negatives[73] + negatives[74]) / 2, np.full(248, 0.9), negatives]
+    full = np.r_[np.full(250, 0.9), negatives]
+    with pytest.raises(ValueError, match='0.0050 AUC-ROC'):
+        _pruning_auc_loss(FixedScores(full), FixedScores(pruned), (None, labels), max_auc_loss=0.005)
+    assert _pruning_auc_loss(FixedScores(full), FixedScores(pruned), (None, labels),
+                             max_auc_loss=0.0051) == {'retinopathy_risk': 0.005}
+
+
+def test_prediction_cache_serves_repeat_requests(trained_engine, clinical_data):
+    engine = DiabetesRiskEngine(prediction_cache=PredictionCache(max_entries=50))
+    engine.model = trained_engine.model
+    engine._on_model_changed()
+
+    patient = clinical_data[engine.features].iloc[0].tolist()
+    first = engine.predict_individual_risk(patient)
+    assert engine.predict_individual_risk([float(v) for v in patient]) == first
+    assert engine.prediction_cache.hits == 1
+
+    panel = clinical_data.head(30)
+    assert engine.predict_batch(panel).equals(trained_engine.predict_batch(panel))
+    assert engine.prediction_cache.hits == 2
+    assert engine.predict_batch(panel).equals(trained_engine.predict_batch(panel))
+    assert engine.prediction_cache.hits == 32
+
+    engine.train_model(clinical_data.sample(frac=1.0, random_state=1))
+    assert len(engine.prediction_cache) == 0
+
+
+def test_prediction_cache_lru_and_ttl():
+    cache = PredictionCache(max_entries=2, ttl_seconds=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.evictions == 1
+
+    expiring = PredictionCache(max_entries=2, ttl_seconds=0)
+    expiring.put('a', 1)
+    assert expiring.get('a') is None
+    assert expiring.stats()['expirations'] == 1
+
+
+def test_micro_batch_predictor_matches_single_patient(trained_engine, clinical_data):
+    patients = clinical_data[trained_engine.features].head(20).values.tolist()
+
+    async def score_concurrently():
+        async with MicroBatchPredictor(trained_engine, max_batch_size=8, max_wait_ms=20) as predictor:
+            results = await asyncio.gather(*(predictor.predict(p) for p in patients))
+            return results, predictor.stats()
+
+    results, stats = asyncio.run(score_concurrently())
+    assert results == [trained_engine.predict_individual_risk(p) for p in patients]
+    assert stats['requests_scored'] == len(patients)
+    assert stats['batches_scored'] < len(patients)
+
+
+def test_micro_batch_predictor_rejects_wrong_length_requests(trained_engine, clinical_data):
+    patient = clinical_data[trained_engine.features].iloc[0].tolist()
+
+    async def score_concurrently():
+        async with MicroBatchPredictor(trained_engine, max_batch_size=8, max_wait_ms=20) as predictor:
+            return await asyncio.gather(
+                predictor.predict(patient[:-1]), predictor.predict(patient + [1.0]), predictor.predict(patient)
+            )
+
+    short, long, valid = asyncio.run(score_concurrently())
+    for result in (short, long):
+        assert isinstance(result, str) and result.startswith("Prediction error: Expected 11 features")
+    # The valid request in the same batch is unaffected
+    assert valid == trained_engine.predict_individual_risk(patient)
+
+
+def test_update_model_grows_and_retires_trees(clinical_data):
+    engine = DiabetesRiskEngine(prediction_cache=PredictionCache())
+    engine.train_model(clinical_data)
+    fingerprint = engine.model_fingerprint
+    patient = clinical_data[engine.features].iloc[0].tolist()
+    engine.predict_individual_risk(patient)
+
+    new_data = make_clinical_data(n_patients=120, seed=21)
+    engine.update_model(new_data, n_new_trees=10, max_trees=105)
+
+    assert engine.model_fingerprint != fingerprint
+    assert len(engine.prediction_cache) == 0
+    for complication, model in engine.model.items():
+        assert len(model.estimators_) == model.n_estimators == 105
+        assert engine.performance_metrics[complication]['training_samples'] == 96
+        assert engine.performance_metrics[complication]['update_round'] == 1
+
+    sklearn_scores = engine.predict_batch(clinical_data)
+    engine.set_inference_backend('compiled')
+    pd.testing.assert_frame_equal(engine.predict_batch(clinical_data), sklearn_scores)
+
+
+def test_update_model_keeps_training_class_weights(clinical_data):
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data)
+    weights = {complication: model.class_weight for complication, model in engine.model.items()}
+    assert all(isinstance(weight, dict) for weight in weights.values())
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        engine.update_model(make_clinical_data(n_patients=120, seed=21), n_new_trees=5)
+    assert not [w for w in caught if 'class_weight' in str(w.message)]
+    assert {complication: model.class_weight for complication, model in engine.model.items()} == weights
+
+
+def test_update_model_on_shared_forest(clinical_data):
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data, multi_output=True)
+    engine.update_model(make_clinical_data(n_patients=120, seed=21), n_new_trees=5)
+
+    forest = engine.model['retinopathy_risk'].forest
+    assert all(model.forest is forest for model in engine.model.values())
+    assert len(forest.estimators_) == 105
+    assert isinstance(engine.predict_individual_risk(clinical_data[engine.features].iloc[0].tolist()), dict)
+
+
+def test_tuned_params_are_reused_and_saved(tmp_path):
+    clinical_data = make_clinical_data(n_patients=600, seed=5)
+    engine = DiabetesRiskEngine()
+    results = engine.tune_hyperparameters(clinical_data, n_candidates=6, min_samples=100, n_workers=2)
+
+    for complication, result in results.items():
+        assert result['rungs'][0]['candidates'] == 6
+        assert result['rungs'][-1]['trees'] == 100 or result['stopped_early']
+        assert engine.model_params[complication] == result['params']
+
+    engine.train_model(clinical_data)
+    for complication, model in engine.model.items():
+        for key, value in engine.model_params[complication].items():
+            assert model.get_params()[key] == value
+
+    for artifact_format, filename in (('joblib', 'model.joblib'), ('arrays', 'model_arrays')):
+        engine.save_model(str(tmp_path / filename), artifact_format=artifact_format)
+        reloaded = DiabetesRiskEngine()
+        reloaded.load_model(str(tmp_path / filename))
+        assert reloaded.model_params == engine.model_params
+
+
+def test_gradient_boosting_backend_per_complication(clinical_data, tmp_path):
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data, model_backend={'nephropathy_risk': 'hist_gradient_boosting'})
+
+    assert engine.model_backends['nephropathy_risk'] == 'hist_gradient_boosting'
+    assert engine.performance_metrics['retinopathy_risk']['model_backend'] == 'random_forest'
+    patient = clinical_data[engine.features].iloc[3].tolist()
+    prediction = engine.predict_individual_risk(patient)
+    batch = engine.predict_batch(clinical_data.iloc[[3]])
+    for complication, risk in prediction.items():
+        assert risk['probability'] == batch[f"{complication}_probability"].iloc[0]
+
+    path = str(tmp_path / 'mixed.joblib')
+    engine.save_model(path)
+    reloaded = DiabetesRiskEngine()
+    reloaded.load_model(path)
+    assert reloaded.model_backends == engine.model_backends
+    assert reloaded.predict_individual_risk(patient) == prediction
+
+    engine.set_inference_backend('compiled')
+    assert engine.predict_individual_risk(patient).startswith("Prediction error")
+    with pytest.raises(ValueError):
+        engine.train_model(clinical_data, model_backend='xgboost')
+
+
+def test_gradient_boosting_shares_one_binner(clinical_data):
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data, model_backend='hist_gradient_boosting')
+    binners = {id(model.binner_) for model in engine.model.values()}
+    assert len(binners) == 1
+
+
+def test_binner_keeps_missing_values_apart_from_extremes(clinical_data):
+    from gradient_boosting import MISSING_CODE, FeatureBinner
+
+    X = clinical_data[['hba1c', 'systolic_bp']].to_numpy(dtype=np.float64)
+    binner = FeatureBinner().fit(X)
+    codes = binner.transform(np.vstack([X.max(axis=0), [np.nan, np.nan]]))
+    assert (codes[1] == MISSING_CODE).all()
+    assert (codes[0] != codes[1]).all()
+
+    # Boosting trains and scores through missing values without imputation
+    data = clinical_data.copy()
+    data.loc[data.index[::7], 'hba1c'] = np.nan
+    engine = DiabetesRiskEngine()
+    assert engine.train_model(data, model_backend='hist_gradient_boosting') is not None
+    scores = engine.predict_batch(data)
+    assert not isinstance(scores, str)
+    assert np.isfinite(scores.select_dtypes('number').to_numpy()).all()
@@ -0,0 +1,52 @@
+"""
+Lightweight Inference Tests - NIW Evidence
+Validates the NumPy-only scoring entry point and lazy heavy imports
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+AI_ENGINE_DIR = os.path.join(os.path.dirname(__file__), 'ai-engine')
+sys.path.insert(0, AI_ENGINE_DIR)
+
+from risk_inference import load_risk_scorer
+from risk_prediction import DiabetesRiskEngine
+from test_risk_engine import make_clinical_data
+
+
+def loaded_modules(statement):
+    """Top-level packages imported by ``statement`` in a fresh interpreter"""
+    script = f"import sys; {statement}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    result = subprocess.run([sys.executable, '-c', script], cwd=AI_ENGINE_DIR,
+                            capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def test_scorer_matches_compiled_engine(tmp_path):
+    clinical_data = make_clinical_data()
+    engine = DiabetesRiskEngine()
+    engine.train_model(clinical_data)
+    engine.save_model(str(tmp_path / 'model_arrays'), artifact_format='arrays')
+    engine.set_inference_backend('compiled')
+
+    scorer = load_risk_scorer(str(tmp_path / 'model_arrays'))
+    patients = clinical_data[engine.features]
+    expected = engine.predict_batch(patients)
+    scores = scorer.predict_batch({feature: patients[feature].to_numpy() for feature in scorer.features})
+    assert list(scores) == list(expected.columns)
+    for column, values in scores.items():
+        assert np.array_equal(values, expected[column].to_numpy())
+    assert scorer.predict_individual_risk(patients.iloc[0].tolist()) == \
+        engine.predict_individual_risk(patients.iloc[0].tolist())
+
+    with pytest.raises(ValueError):
+        load_risk_scorer(str(tmp_path))
+
+
+def test_scoring_paths_skip_heavy_imports():
+    assert not {'pandas', 'sklearn', 'joblib', 'scipy'} & loaded_modules("import risk_inference")
+    assert not {'sklearn', 'joblib'} & loaded_modules("import risk_prediction")